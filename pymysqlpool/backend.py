@@ -0,0 +1,394 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : backend.py
+# Date   : 2026-10-18 14-20
+# Version: 0.1
+# Description: driver backends used by the connection pool to talk to the database.
+
+import itertools
+import logging
+import threading
+
+from pymysqlpool.session import tracking_class
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['DriverBackend', 'PyMySQLBackend', 'MySQLdbBackend', 'FakeBackend',
+           'get_backend', 'register_backend', 'DriverNotFoundError']
+
+
+COM_RESET_CONNECTION = 0x1F
+
+# Standard cursor class names, the same in pymysql and mysqlclient
+_cursor_names = {
+    (False, False): 'Cursor',
+    (True, False): 'DictCursor',
+    (False, True): 'SSCursor',
+    (True, True): 'SSDictCursor',
+}
+
+
+class DriverNotFoundError(Exception):
+    pass
+
+
+class DriverBackend(object):
+    """
+    Base class of the driver backends.
+    A backend creates connections and hides the differences between the client libraries.
+    The connection objects should support the DB-API, plus `autocommit(value)`,
+    `get_autocommit()` and `cursor(cursor_class)`.
+    """
+    name = None
+    # The driver module, which has a `cursors` module with the standard cursor classes
+    _driver = None
+
+    def connect(self, host, user, password, database, port, charset, use_dict_cursor, **kwargs):
+        """Create a new connection object"""
+        raise NotImplementedError
+
+    def ping(self, connection, reconnect=True):
+        """Return True if the connection is alive, reconnect it in place if `reconnect` is True"""
+        try:
+            connection.ping(reconnect)
+        except Exception as err:
+            logger.debug('Ping connection failed: {}'.format(err))
+            return False
+        else:
+            return True
+
+    def cursor_class(self, dict_cursor=False, streaming=False):
+        """Return the cursor class of the driver, rows are dicts if `dict_cursor` is True,
+        and fetched from the server on demand if `streaming` is True. None for the default one.
+        """
+        if self._driver is None:
+            return None
+        return getattr(self._driver.cursors, _cursor_names[bool(dict_cursor), bool(streaming)])
+
+    def resolve_cursor(self, cursor):
+        """Translate a standard cursor class of any driver to the one of this driver,
+        other cursor classes are returned as they are.
+        """
+        name = getattr(cursor, '__name__', None)
+        for (dict_cursor, streaming), cursor_name in _cursor_names.items():
+            if name == cursor_name:
+                return self.cursor_class(dict_cursor, streaming)
+        return cursor
+
+    def get_autocommit(self, connection):
+        return connection.get_autocommit()
+
+    def set_autocommit(self, connection, value):
+        connection.autocommit(value)
+
+    def thread_id(self, connection):
+        """Return the thread id of the connection on the server side"""
+        return connection.thread_id()
+
+    # Whether `reset_connection` is supported, if not, a connection with a changed session
+    # is closed when it's returned, and a new one is created on demand.
+    supports_reset_connection = False
+
+    def in_transaction(self, connection):
+        """Return True if the server reports an open transaction on the connection.
+        It catches the transactions which are not started by `query()`, e.g. `Connection.begin()`.
+        False if the driver doesn't expose the server status.
+        """
+        return False
+
+    def reset_connection(self, connection):
+        """Reset the session state(variables, temporary tables, locks, transaction) of the connection,
+        keep its charset and autocommit mode.
+        """
+        raise NotImplementedError('Backend "{}" can not reset a session'.format(self.name))
+
+    def local_infile_options(self, kwargs):
+        """Return the connect keyword arguments of a connection which is allowed to send
+        `LOAD DATA LOCAL INFILE` data, based on `kwargs`
+        """
+        raise NotImplementedError('Backend "{}" does not support LOAD DATA LOCAL INFILE'.format(self.name))
+
+    def load_local_stream(self, connection, sql, chunks):
+        """Execute a `LOAD DATA LOCAL INFILE` statement, the file content is sent from `chunks`
+        instead of a local file.
+
+        :return: tuple of affected rows and warning count
+        """
+        raise NotImplementedError('Backend "{}" does not support LOAD DATA LOCAL INFILE'.format(self.name))
+
+
+class PyMySQLBackend(DriverBackend):
+    """Backend of `pymysql`, the pure python client"""
+    name = 'pymysql'
+    supports_reset_connection = True
+
+    def __init__(self):
+        try:
+            import pymysql
+        except ImportError:
+            raise DriverNotFoundError('Package "pymysql" is required by backend "pymysql"')
+        self._driver = pymysql
+
+    def connect(self, host, user, password, database, port, charset, use_dict_cursor, **kwargs):
+        connection_class = tracking_class(self._driver.connections.Connection)
+        return connection_class(host=host,
+                                user=user,
+                                password=password,
+                                database=database,
+                                port=port,
+                                charset=charset,
+                                cursorclass=self.cursor_class(use_dict_cursor),
+                                **kwargs)
+
+    def in_transaction(self, connection):
+        # Updated by every OK/EOF packet, no round trip is needed
+        from pymysql.constants import SERVER_STATUS
+        return bool(connection.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS)
+
+    def reset_connection(self, connection):
+        # COM_RESET_CONNECTION is available since MySQL 5.7.3, it resets the session
+        # variables to the global values, so the charset and autocommit mode are restored after it.
+        autocommit = connection.get_autocommit()
+        connection._execute_command(COM_RESET_CONNECTION, b'')
+        connection._read_ok_packet()
+
+        if hasattr(connection, 'set_character_set'):
+            connection.set_character_set(connection.charset, getattr(connection, 'collation', None))
+        else:
+            connection.set_charset(connection.charset)
+        connection.autocommit(autocommit)
+
+    def local_infile_options(self, kwargs):
+        # Only the capability flag is set, not `local_infile=True`, so pymysql still refuses
+        # to read local files on request of the server, the data is only sent from `load_local_stream`.
+        from pymysql.constants import CLIENT
+        kwargs = dict(kwargs)
+        kwargs['client_flag'] = kwargs.get('client_flag', 0) | CLIENT.LOCAL_FILES
+        return kwargs
+
+    def load_local_stream(self, connection, sql, chunks):
+        from pymysql import err
+        from pymysql.constants import COMMAND
+        from pymysql.protocol import OKPacketWrapper
+
+        connection._execute_command(COMMAND.COM_QUERY, sql)
+        packet = connection._read_packet()
+        if not packet.is_load_local_packet():
+            raise err.OperationalError(2014, 'Expected LOCAL INFILE request, got another response')
+
+        # Chunks are split again, a packet can't exceed `max_allowed_packet`
+        packet_size = min(connection.max_allowed_packet, 16 * 1024 * 1024 - 1)
+        try:
+            for chunk in chunks:
+                for i in range(0, len(chunk), packet_size):
+                    connection.write_packet(chunk[i:i + packet_size])
+        finally:
+            # An empty packet ends the data, the server always replies, even if sending is interrupted
+            connection.write_packet(b'')
+            packet = connection._read_packet()
+
+        if not packet.is_ok_packet():
+            raise err.OperationalError(2014, 'Commands Out of Sync')
+        ok_packet = OKPacketWrapper(packet)
+        connection.server_status = ok_packet.server_status
+        return ok_packet.affected_rows, ok_packet.warning_count
+
+
+class MySQLdbBackend(DriverBackend):
+    """Backend of `MySQLdb`(mysqlclient), the C based client"""
+    name = 'mysqldb'
+
+    def __init__(self):
+        try:
+            import MySQLdb
+        except ImportError:
+            raise DriverNotFoundError('Package "mysqlclient" is required by backend "mysqldb"')
+        self._driver = MySQLdb
+
+    def connect(self, host, user, password, database, port, charset, use_dict_cursor, **kwargs):
+        config = dict(host=host, user=user, passwd=password, port=port, charset=charset,
+                      cursorclass=self.cursor_class(use_dict_cursor))
+        if database is not None:
+            config['db'] = database
+        config.update(kwargs)
+        return tracking_class(self._driver.connections.Connection)(**config)
+
+    def ping(self, connection, reconnect=True):
+        # mysqlclient can't reconnect in place, a dead connection will be replaced by the pool
+        try:
+            connection.ping()
+        except Exception as err:
+            logger.debug('Ping connection failed: {}'.format(err))
+            return False
+        else:
+            return True
+
+
+class FakeCursor(object):
+    """Cursor of `FakeConnection`, rows are produced by the `query_handler` of the backend"""
+
+    def __init__(self, connection, cursor_class=None):
+        self.connection = connection
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, query, args=None):
+        rows = self.connection.query(query, args)
+        self._rows = list(rows or [])
+        self.rowcount = len(self._rows)
+        return self.rowcount
+
+    def executemany(self, query, args):
+        return sum(self.execute(query, arg) for arg in args)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+class FakeConnection(object):
+    """An in-memory connection, all the executed queries are recorded in `queries`"""
+
+    def __init__(self, backend, thread_id, database=None, autocommit=False):
+        self._backend = backend
+        self._thread_id = thread_id
+        self._autocommit = autocommit
+        self.database = database
+        self.queries = []
+        self.loaded = []
+        self.local_infile = False
+        self.open = True
+
+    def __repr__(self):
+        return '<FakeConnection thread_id={}>'.format(self._thread_id)
+
+    def query(self, sql, args=None):
+        self._command(sql, args)
+        return self._backend.query_handler(self, sql, args)
+
+    def _command(self, sql, args=None):
+        # Like `_execute_command` of pymysql, it's not seen by `query()`
+        if not self.open:
+            raise ConnectionError('Connection {} is closed'.format(self._thread_id))
+        self.queries.append((sql, args))
+
+    def cursor(self, cursor=None):
+        return FakeCursor(self, cursor)
+
+    def ping(self, reconnect=True):
+        if not self.open:
+            if not reconnect:
+                raise ConnectionError('Connection {} is closed'.format(self._thread_id))
+            self.open = True
+
+    def thread_id(self):
+        return self._thread_id
+
+    def get_autocommit(self):
+        return self._autocommit
+
+    def autocommit(self, value):
+        self._autocommit = bool(value)
+
+    def load(self, sql, chunks):
+        data = b''.join(chunks)
+        self.query(sql)
+        self.loaded.append(data)
+        return data.count(b'\n'), 0
+
+    def select_db(self, db):
+        self.query('USE `{}`'.format(db))
+        self.database = db
+
+    def begin(self):
+        self._command('BEGIN')
+
+    def commit(self):
+        self._command('COMMIT')
+
+    def rollback(self):
+        self._command('ROLLBACK')
+
+    def close(self):
+        self.open = False
+
+
+class FakeBackend(DriverBackend):
+    """
+    An in-memory backend for tests, no database server is required.
+    `query_handler(connection, sql, args)` returns the rows of a query, default is no rows.
+    """
+    name = 'fake'
+    supports_reset_connection = True
+
+    def __init__(self, query_handler=None):
+        self.query_handler = query_handler or (lambda connection, sql, args: [])
+        self.connections = []
+        self._thread_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def connect(self, host, user, password, database, port, charset, use_dict_cursor, **kwargs):
+        with self._lock:
+            connection = tracking_class(FakeConnection)(self, next(self._thread_ids), database,
+                                                        kwargs.get('autocommit', False))
+            connection.local_infile = kwargs.get('local_infile', False)
+            self.connections.append(connection)
+        return connection
+
+    def reset_connection(self, connection):
+        connection.queries.append(('COM_RESET_CONNECTION', None))
+
+    def local_infile_options(self, kwargs):
+        return dict(kwargs, local_infile=True)
+
+    def load_local_stream(self, connection, sql, chunks):
+        return connection.load(sql, chunks)
+
+
+_backends = {
+    PyMySQLBackend.name: PyMySQLBackend,
+    MySQLdbBackend.name: MySQLdbBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def register_backend(name, backend_class):
+    """Register a backend class so that it can be chosen by name"""
+    _backends[name] = backend_class
+
+
+def get_backend(driver):
+    """Return a backend instance by its name, a `DriverBackend` instance is returned as it is"""
+    if isinstance(driver, DriverBackend):
+        return driver
+
+    try:
+        backend_class = _backends[driver]
+    except KeyError:
+        raise DriverNotFoundError('Unknown driver backend "{}", '
+                                  'available backends are {}'.format(driver, sorted(_backends)))
+    return backend_class()
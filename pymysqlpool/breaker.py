@@ -0,0 +1,120 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : breaker.py
+# Date   : 2026-10-18 22-10
+# Version: 0.1
+# Description: circuit breaker of the connection creation.
+
+import time
+import random
+import logging
+import threading
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['CircuitBreaker', 'CircuitBreakerOpenError']
+
+
+class CircuitBreakerOpenError(Exception):
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker of the connection creation, so that a recovering server
+    won't be hammered by the handshakes of all the borrowers.
+
+    - Only one creation attempt is in flight at a time.
+    - After a failure the circuit opens, attempts are rejected until the backoff
+      (exponential with jitter) expires.
+    - Then the circuit is half open, a single probe is allowed. It closes the circuit
+      on success, or opens it again with a longer backoff on failure.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, backoff=0.1, max_backoff=30.0, jitter=0.5):
+        """
+        :param backoff: backoff in seconds after the first failure, doubled on each failure in a row
+        :param max_backoff: maximum backoff in seconds
+        :param jitter: the backoff is randomized in `[backoff * (1 - jitter), backoff]`
+        """
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._in_flight = False
+        self._failures = 0
+        self._retry_at = 0
+        self._total_failures = 0
+        self._rejected = 0
+
+    def __repr__(self):
+        return '<CircuitBreaker state={!r}, failures={!r}>'.format(self.state, self._failures)
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() >= self._retry_at:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self):
+        """True if attempts are rejected because of the backoff"""
+        return self._state == self.OPEN and time.monotonic() < self._retry_at
+
+    def retry_after(self):
+        """Seconds before the next attempt is allowed"""
+        return max(0.0, self._retry_at - time.monotonic()) if self._state == self.OPEN else 0.0
+
+    def acquire(self):
+        """Return True if the caller may attempt to create a connection now,
+        `record_success` or `record_failure` must be called after the attempt.
+        """
+        with self._lock:
+            if self._in_flight:
+                return False
+            if self._state == self.OPEN:
+                if time.monotonic() < self._retry_at:
+                    self._rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                logger.info('Circuit breaker is half open, probe the server')
+            self._in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info('Circuit breaker is closed')
+            self._in_flight = False
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._in_flight = False
+            self._failures += 1
+            self._total_failures += 1
+            backoff = min(self._max_backoff, self._backoff * 2 ** (self._failures - 1))
+            backoff *= random.uniform(1 - self._jitter, 1)
+            self._retry_at = time.monotonic() + backoff
+            self._state = self.OPEN
+            logger.warning('Circuit breaker is open, retry after {:.3f}s'.format(backoff))
+
+    @property
+    def stats(self):
+        return {
+            'state': self.state,
+            'failures': self._failures,
+            'total_failures': self._total_failures,
+            'rejected': self._rejected,
+            'retry_after': self.retry_after(),
+        }
@@ -10,17 +10,18 @@ import logging
 import threading
 import contextlib
 
-from pymysql.connections import Connection
-from pymysql.cursors import DictCursor, Cursor
-
-from pymysqlpool.pool import PoolContainer, PoolIsFullException, PoolIsEmptyException
+from pymysqlpool.backend import get_backend
+from pymysqlpool.breaker import CircuitBreaker, CircuitBreakerOpenError
+from pymysqlpool.lanes import PriorityLanes, PRIORITY_NORMAL
+from pymysqlpool.loader import load_rows
+from pymysqlpool.pool import PoolContainer, StripedPoolContainer, PoolIsFullException, PoolIsEmptyException
 
 __version__ = '0.1'
 __author__ = 'Chris'
 
 logger = logging.getLogger('pymysqlpool')
 
-__all__ = ['MySQLConnectionPool']
+__all__ = ['MySQLConnectionPool', 'QueryTimeoutError', 'CircuitBreakerOpenError']
 
 
 class NoFreeConnectionFoundError(Exception):
@@ -31,16 +32,83 @@ class PoolBoundaryExceedsError(Exception):
     pass
 
 
+class QueryTimeoutError(Exception):
+    pass
+
+
+class _BorrowDeadline(object):
+    """
+    Kill the running query of a borrowed connection once the timeout expires.
+    The lock makes sure a connection won't be killed after it's returned to the pool.
+
+    It's installed as the `statement_guard` of the connection(see `SessionTrackingMixin.query`),
+    so it knows whether a statement is running. If the deadline expires between statements,
+    nothing is killed, but the later statements of this borrow are refused.
+    Connections without the guard hook are killed whenever the deadline expires.
+    """
+
+    def __init__(self, pool, connection, timeout):
+        self._lock = threading.Lock()
+        self._finished = False
+        self._timeout = timeout
+        self._guarded = hasattr(type(connection), 'statement_guard')
+        self._in_flight = False
+        self.expired = False
+        self.interrupted = False
+        if self._guarded:
+            connection.statement_guard = self
+        self._timer = threading.Timer(timeout, self._expire, args=(pool, connection))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def enter(self):
+        """Called before a statement is sent, refuse it if the deadline has expired"""
+        with self._lock:
+            if self.expired:
+                raise QueryTimeoutError('Borrow exceeded the deadline of {}s'.format(self._timeout))
+            self._in_flight = True
+
+    def exit(self):
+        """Called after a statement is finished"""
+        with self._lock:
+            self._in_flight = False
+
+    def _expire(self, pool, connection):
+        with self._lock:
+            if self._finished:
+                return
+            self.expired = True
+            if self._guarded and not self._in_flight:
+                logger.debug('[{}] Borrow deadline expired between statements'.format(pool))
+                return
+            self.interrupted = True
+            logger.warning('[{}] Borrow deadline expired, kill the running query'.format(pool))
+            pool.kill_query(connection)
+
+    def finish(self, connection):
+        """Stop the timer, return True if a running query has been killed"""
+        self._timer.cancel()
+        with self._lock:
+            self._finished = True
+            if self._guarded:
+                connection.statement_guard = None
+            return self.interrupted
+
+
 class MySQLConnectionPool(object):
     """
     A connection pool manager.
     """
+    _borrow_poll_interval = 1.0
 
     def __init__(self, pool_name, host=None, user=None, password="", database=None, port=3306,
                  charset='utf8', use_dict_cursor=True, max_pool_size=16,
                  enable_auto_resize=True, auto_resize_scale=1.5,
                  pool_resize_boundary=48,
-                 defer_connect_pool=False, **kwargs):
+                 defer_connect_pool=False, driver='pymysql', container_stripes=None,
+                 breaker_backoff=0.1, breaker_max_backoff=30.0,
+                 reserved_connections=0, lane_weights=None, starvation_timeout=1.0,
+                 default_priority=PRIORITY_NORMAL, **kwargs):
 
         """
         Initialize the connection pool.
@@ -63,7 +131,21 @@ class MySQLConnectionPool(object):
         :param auto_resize_scale: `max_pool_size * auto_resize_scale` is the new max_pool_size.
                                 The max_pool_size will be changed dynamically only if `enable_auto_resize` is True.
         :param defer_connect_pool: don't connect to pool on construction, wait for explicit call. Default is False.
-        :param kwargs: other keyword arguments to be passed to `pymysql.Connection`
+        :param driver: name of the driver backend, 'pymysql'(default), 'mysqldb' or 'fake',
+                       or an instance of `pymysqlpool.backend.DriverBackend`
+        :param container_stripes: if set, free connections are kept in this number of free lists(stripes),
+                                  to reduce the contention of many borrowing threads. Default is a single queue.
+        :param breaker_backoff: backoff in seconds after a connection creation fails, it's doubled on each
+                                failure in a row. Borrowers fail fast with `CircuitBreakerOpenError` meanwhile.
+        :param breaker_max_backoff: maximum backoff in seconds of the connection creation
+        :param reserved_connections: number of connections reserved for the high priority borrowers.
+                                     Priority lanes are enabled if it or `lane_weights` is set.
+        :param lane_weights: weights of the priority lanes, default is `{'high': 4, 'normal': 2, 'low': 1}`.
+                             Waiting borrowers are served by their weights when the pool is used up.
+        :param starvation_timeout: seconds after which a waiting borrower is served regardless of its priority
+        :param default_priority: priority lane of the borrowers without a priority, default is 'normal'.
+                                 It must be one of the `lane_weights`.
+        :param kwargs: other keyword arguments to be passed to the connection class of the driver
         """
         # config for a database connection
         self._host = host
@@ -72,8 +154,9 @@ class MySQLConnectionPool(object):
         self._database = database
         self._port = port
         self._charset = charset
-        self._cursor_class = DictCursor if use_dict_cursor else Cursor
+        self._use_dict_cursor = use_dict_cursor
         self._other_kwargs = kwargs
+        self._backend = get_backend(driver)
 
         # config for the connection pool
         self._pool_name = pool_name
@@ -87,12 +170,29 @@ class MySQLConnectionPool(object):
 
         self._auto_resize_scale = int(round(auto_resize_scale, 0))
         # self.wait_timeout = wait_timeout
-        self._pool_container = PoolContainer(self._max_pool_size)
+        if container_stripes:
+            self._pool_container = StripedPoolContainer(self._max_pool_size, container_stripes)
+        else:
+            self._pool_container = PoolContainer(self._max_pool_size)
+
+        self._breaker = CircuitBreaker(breaker_backoff, breaker_max_backoff)
 
         self.__safe_lock = threading.RLock()
+        # A reserved connection out of the pool, used to kill the queries of expired borrows
+        self.__control_lock = threading.Lock()
+        self.__control_connection = None
         self.__is_killed = False
         self.__is_connected = False
 
+        # Validated after the locks are set, `__del__` closes a pool which fails here
+        self._lanes = None
+        if reserved_connections or lane_weights:
+            if reserved_connections >= self._lane_capacity():
+                raise ValueError('Invalid reserved_connections {}, must be less than '
+                                 'the pool capacity {}'.format(reserved_connections, self._lane_capacity()))
+            self._lanes = PriorityLanes(self._lane_capacity, reserved_connections, lane_weights,
+                                        starvation_timeout, default_priority=default_priority)
+
         if not defer_connect_pool:
             self.connect()
 
@@ -126,15 +226,33 @@ class MySQLConnectionPool(object):
                                                                    self.pool_size,
                                                                    self.free_size)
 
+    @property
+    def stats(self):
+        return {
+            'pool_name': self.pool_name,
+            'max_pool_size': self._max_pool_size,
+            'pool_size': self.pool_size,
+            'free_size': self.free_size,
+            'breaker': self._breaker.stats,
+            'lanes': self._lanes.stats if self._lanes is not None else {},
+        }
+
     @contextlib.contextmanager
-    def cursor(self, cursor=None):
+    def cursor(self, cursor=None, timeout=None, priority=None, dict_cursor=None, streaming=False):
         """Shortcut to get a cursor object from a free connection.
         It's not that efficient to get cursor object in this way for
         too many times.
+
+        :param cursor: cursor class, the standard ones(`Cursor`, `DictCursor`, `SSCursor`, `SSDictCursor`)
+                       of any driver are translated to the classes of the driver backend
+        :param timeout: deadline in seconds, see `connection`
+        :param priority: priority lane of the borrower, see `borrow_connection`
+        :param dict_cursor: whether rows are dicts, default is `use_dict_cursor` of the pool
+        :param streaming: whether rows are fetched from the server on demand(unbuffered cursor)
         """
-        with self.connection(autocommit=True) as conn:
-            assert isinstance(conn, Connection)
-            cursor = conn.cursor(cursor)
+        cursor_class = self._cursor_class(cursor, dict_cursor, streaming)
+        with self.connection(autocommit=True, timeout=timeout, priority=priority) as conn:
+            cursor = conn.cursor(cursor_class)
 
             try:
                 yield cursor
@@ -144,20 +262,63 @@ class MySQLConnectionPool(object):
             finally:
                 cursor.close()
 
+    def _cursor_class(self, cursor, dict_cursor, streaming):
+        """Resolve the cursor arguments through the driver backend, None for the default cursor"""
+        if cursor is not None:
+            return self._backend.resolve_cursor(cursor)
+        if dict_cursor is None and not streaming:
+            return None
+        dict_cursor = self._use_dict_cursor if dict_cursor is None else dict_cursor
+        return self._backend.cursor_class(dict_cursor, streaming)
+
     @contextlib.contextmanager
-    def connection(self, autocommit=False):
-        conn = self.borrow_connection()
-        assert isinstance(conn, Connection)
-        old_value = conn.get_autocommit()
-        conn.autocommit(autocommit)
+    def connection(self, autocommit=False, timeout=None, priority=None):
+        """Borrow a connection and return it to the pool on exit.
+
+        :param autocommit: autocommit mode during this borrow
+        :param timeout: deadline in seconds for this borrow. When it expires while a statement is running,
+                        the statement is killed by `KILL QUERY`, a `QueryTimeoutError` will be raised and
+                        the connection is recovered, or replaced if it's broken. The statements sent after
+                        the deadline are refused with a `QueryTimeoutError`, the finished ones are kept.
+        :param priority: priority lane of the borrower, see `borrow_connection`
+        """
+        conn = self.borrow_connection(priority)
+        old_value = self._backend.get_autocommit(conn)
+        self._backend.set_autocommit(conn, autocommit)
+        deadline = _BorrowDeadline(self, conn, timeout) if timeout else None
         try:
             yield conn
         except Exception as err:
             # logger.error(err, exc_info=True)
+            if deadline is not None and deadline.interrupted:
+                raise QueryTimeoutError('Query exceeded the deadline of {}s'.format(timeout)) from err
             raise err
+        else:
+            # Some killed queries end without an error, e.g. `SELECT SLEEP(n)`
+            if deadline is not None and deadline.interrupted:
+                raise QueryTimeoutError('Query exceeded the deadline of {}s'.format(timeout))
         finally:
-            conn.autocommit(old_value)
-            self.return_connection(conn)
+            if deadline is not None and deadline.finish(conn):
+                self._recover_connection(conn, old_value)
+            else:
+                self._release_connection(conn, old_value)
+
+    def load_rows(self, table, columns, rows, parallel=1, chunk_size=64 * 1024):
+        """Bulk load rows into a table with `LOAD DATA LOCAL INFILE`.
+        Rows are serialized into a tab-separated stream incrementally, no temporary file is written
+        and the whole data set is never held in memory. Each loader opens its own connection
+        with the `local_infile` capability out of the pool and closes it afterwards, the pool
+        connections are left alone. It must be enabled on the server too.
+
+        :param table: name of the table, `database.table` is supported
+        :param columns: column names of the rows
+        :param rows: iterable of row tuples
+        :param parallel: number of connections to split the rows across, each one loads in its own
+                         transaction, so a parallel load is not atomic
+        :param chunk_size: size in bytes of the chunks sent to the server
+        :return: `LoadResult(rows, seconds, rows_per_second, warnings)`
+        """
+        return load_rows(self, table, columns, rows, parallel, chunk_size)
 
     def connect(self):
         """Connect to this connection pool
@@ -169,13 +330,15 @@ class MySQLConnectionPool(object):
 
         test_conn = self._create_connection()
         try:
-            test_conn.ping()
+            if not self._backend.ping(test_conn, reconnect=False):
+                raise ConnectionError('[{}] Failed to ping the test connection'.format(self))
         except Exception as err:
             raise err
         else:
             with self.__safe_lock:
                 self.__is_connected = True
 
+            self._open_control_connection()
             self._adjust_connection_pool()
         finally:
             test_conn.close()
@@ -196,32 +359,180 @@ class MySQLConnectionPool(object):
         with self.__safe_lock:
             self.__is_killed = True
 
-    def borrow_connection(self):
+    def borrow_connection(self, priority=None):
         """
         Get a free connection item from current pool. It's a little confused here, but it works as expected now.
+
+        Raise `CircuitBreakerOpenError` if no free connection is found while the connection creation
+        is backing off after failures.
+
+        :param priority: priority lane of the borrower, 'high', 'normal' or 'low' by default,
+                         None for the `default_priority`. It's ignored unless the priority lanes are enabled.
         """
+        if self._lanes is None:
+            return self._borrow_connection()
+
+        priority = priority or self._lanes.default_priority
+        self._lanes.acquire(priority)
+        try:
+            conn = self._borrow_connection()
+        except Exception:
+            self._lanes.release(priority)
+            raise
+        conn._pool_priority = priority
+        return conn
+
+    def _borrow_connection(self):
         block = False
 
         while True:
             conn = self._borrow(block)
-            if conn is None:
-                block = not self._adjust_connection_pool()
-            else:
+            if conn is not None:
                 return conn
 
+            if not self._breaker.is_open:
+                block = not self._adjust_connection_pool()
+                if not block or not self._breaker.is_open:
+                    continue
+
+            raise CircuitBreakerOpenError('[{}] Connection creation is failing, retry after {:.3f}s'.format(
+                self, self._breaker.retry_after()))
+
     def _borrow(self, block):
+        while True:
+            try:
+                # Wake up periodically, the pending connection creation of another borrower may fail
+                connection = self._pool_container.get(block, self._borrow_poll_interval)
+            except PoolIsEmptyException:
+                return None
+
+            # check if the connection is alive or not, a dead one is replaced through the circuit breaker
+            if self._backend.ping(connection, reconnect=False):
+                return connection
+            self._drop_connection(connection)
+            # Try the other free connections before failing fast on the circuit breaker
+            block = False
+
+    def return_connection(self, connection):
+        """Return a connection to the pool, the session state left by the borrower is reset first"""
+        return self._release_connection(connection)
+
+    def kill_query(self, connection):
+        """Kill the running query of a borrowed connection with `KILL QUERY`.
+        It's sent through a reserved control connection out of the pool, so it works
+        even if all the connections are borrowed. Errors are logged, not raised.
+        """
+        thread_id = self._backend.thread_id(connection)
+        logger.debug('[{}] Kill query of connection {}'.format(self, thread_id))
+
+        with self.__control_lock:
+            try:
+                if self.__control_connection is not None and \
+                        not self._backend.ping(self.__control_connection, reconnect=True):
+                    try:
+                        self.__control_connection.close()
+                    except Exception:
+                        pass
+                    self.__control_connection = None
+                if self.__control_connection is None:
+                    self.__control_connection = self._create_connection()
+
+                cursor = self.__control_connection.cursor()
+                try:
+                    cursor.execute('KILL QUERY {:d}'.format(thread_id))
+                finally:
+                    cursor.close()
+            except Exception as err:
+                logger.error('[{}] Failed to kill query {}: {}'.format(self, thread_id, err))
+
+    def _open_control_connection(self):
+        """Open the control connection ahead of time, the server may be out of connections
+        by the time a query has to be killed. It's opened again on demand if it fails here.
+        """
+        with self.__control_lock:
+            if self.__control_connection is not None:
+                return
+            try:
+                self.__control_connection = self._create_connection()
+            except Exception as err:
+                logger.error('[{}] Failed to open the control connection: {}'.format(self, err))
+
+    def _release_connection(self, connection, autocommit=None):
+        """Reset the session, restore the autocommit mode and return the connection to the pool.
+        The connection is dropped if any of them fails, or if it's not reusable.
+        """
+        if not self._is_reusable(connection):
+            logger.debug('[{}] Drop connection which is not reusable'.format(self))
+            self._drop_connection(connection)
+            self._release_lane(connection)
+            return False
+
         try:
-            connection = self._pool_container.get(block, None)
-        except PoolIsEmptyException:
-            return None
+            # Reset before restoring autocommit, turning it on would commit an open transaction
+            self._reset_session(connection)
+            if autocommit is not None:
+                self._backend.set_autocommit(connection, autocommit)
+        except Exception as err:
+            logger.warning('[{}] Drop connection, failed to reset it: {}'.format(self, err))
+            self._drop_connection(connection)
+            return False
+        else:
+            return self._pool_container.return_(connection)
+        finally:
+            self._release_lane(connection)
+
+    def _release_lane(self, connection):
+        """Give the lane slot of a borrowed connection to the waiters"""
+        priority = getattr(connection, '_pool_priority', None)
+        if priority is not None:
+            connection._pool_priority = None
+            self._lanes.release(priority)
+
+    def _is_reusable(self, connection):
+        """A connection with a changed session which the backend can't reset is not returned
+        to the pool. It costs a new connection on a later borrow.
+        """
+        state = getattr(connection, 'session_state', None)
+        return state is None or not state.session_changed or self._backend.supports_reset_connection
+
+    def _reset_session(self, connection):
+        """Reset the session only if it's dirty, a clean connection costs no round trip.
+        An open transaction is rolled back, a changed session is reset by COM_RESET_CONNECTION.
+        """
+        state = getattr(connection, 'session_state', None)
+        # The server status also catches the transactions the session state has missed
+        in_transaction = self._backend.in_transaction(connection)
+        if not in_transaction and (state is None or not state.dirty):
+            return
+
+        logger.debug('[{}] Reset session {!r}'.format(self, state))
+        if state is not None and state.session_changed:
+            if state.database_changed and self._database is None:
+                raise ValueError('Default database is unknown, can not be restored')
+            self._backend.reset_connection(connection)
+            if state.database_changed:
+                connection.select_db(self._database)
+        else:
+            connection.rollback()
+        if state is not None:
+            state.clear()
+
+    def _recover_connection(self, connection, autocommit):
+        """Return a killed connection to the pool, or drop it if it's broken"""
+        if not self._backend.ping(connection, reconnect=False):
+            logger.warning('[{}] Drop broken connection after query killed'.format(self))
+            self._drop_connection(connection)
+            self._release_lane(connection)
         else:
-            # check if the connection is alive or not
-            connection.ping(reconnect=True)
-            return connection
+            self._release_connection(connection, autocommit)
 
-    def return_connection(self, connection):
-        """Return a connection to the pool"""
-        return self._pool_container.return_(connection)
+    def _drop_connection(self, connection):
+        """Remove a borrowed connection from the pool and close it"""
+        self._pool_container.remove(connection)
+        try:
+            connection.close()
+        except Exception:
+            pass
 
     def _adjust_connection_pool(self):
         """
@@ -234,21 +545,33 @@ class MySQLConnectionPool(object):
         if self.pool_size >= self._max_pool_size:
             if self._enable_auto_resize:
                 self._adjust_max_pool_size()
+            if self.pool_size >= self._max_pool_size:
+                return False
+
+        # Only one creation is in flight, and none while the circuit breaker is open
+        if not self._breaker.acquire():
+            return False
 
         try:
             connection = self._create_connection()
         except Exception as err:
+            self._breaker.record_failure()
             logger.error(err)
             return False
         else:
+            self._breaker.record_success()
             try:
                 self._pool_container.add(connection)
             except PoolIsFullException:
                 # logger.debug('[{}] Connection pool is full now'.format(self.pool_name))
+                connection.close()
                 return False
             else:
                 return True
 
+    def _lane_capacity(self):
+        return self._pool_resize_boundary if self._enable_auto_resize else self._max_pool_size
+
     def _adjust_max_pool_size(self):
         with self.__safe_lock:
             self._max_pool_size *= self._auto_resize_scale
@@ -267,14 +590,32 @@ class MySQLConnectionPool(object):
             except Exception as err:
                 _ = err
 
-    def _create_connection(self):
-        """Create a pymysql connection object
+        with self.__control_lock:
+            if self.__control_connection is not None:
+                try:
+                    self.__control_connection.close()
+                except Exception:
+                    pass
+                self.__control_connection = None
+
+    def _create_connection(self, local_infile=False):
+        """Create a connection object with the driver backend
+
+        :param local_infile: whether the connection is allowed to send `LOAD DATA LOCAL INFILE` data,
+                             such a connection must never be put into the pool
         """
-        return Connection(host=self._host,
-                          user=self._user,
-                          password=self._password,
-                          database=self._database,
-                          port=self._port,
-                          charset=self._charset,
-                          cursorclass=self._cursor_class,
-                          **self._other_kwargs)
+        other_kwargs = self._other_kwargs
+        if local_infile:
+            if self._breaker.is_open:
+                raise CircuitBreakerOpenError('[{}] Connection creation is failing, retry after {:.3f}s'.format(
+                    self, self._breaker.retry_after()))
+            other_kwargs = self._backend.local_infile_options(other_kwargs)
+
+        return self._backend.connect(host=self._host,
+                                     user=self._user,
+                                     password=self._password,
+                                     database=self._database,
+                                     port=self._port,
+                                     charset=self._charset,
+                                     use_dict_cursor=self._use_dict_cursor,
+                                     **other_kwargs)
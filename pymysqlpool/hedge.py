@@ -0,0 +1,286 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : hedge.py
+# Date   : 2026-10-18 16-30
+# Version: 0.1
+# Description: hedged reads across several connection pools.
+
+import re
+import time
+import logging
+import itertools
+import threading
+from collections import deque, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['HedgedReader', 'LatencyTracker', 'fingerprint']
+
+_literal_pattern = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|\b\d+(?:\.\d+)?\b")
+_space_pattern = re.compile(r'\s+')
+_read_pattern = re.compile(r'^\s*(\(\s*)*SELECT\b', re.IGNORECASE)
+_locking_read_pattern = re.compile(r'\bFOR\s+UPDATE\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\b', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """Normalize a query, so that the queries differ only in literals share one fingerprint"""
+    sql = _literal_pattern.sub('?', sql)
+    return _space_pattern.sub(' ', sql).strip().lower()
+
+
+def is_idempotent_read(sql):
+    return bool(_read_pattern.match(sql)) and not _locking_read_pattern.search(sql)
+
+
+class LatencyTracker(object):
+    """Rolling latency samples of each query fingerprint"""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, key, latency):
+        with self._lock:
+            self._samples[key].append(latency)
+
+    def percentile(self, key, percent, min_samples=1):
+        """Return the percentile of the latencies, None if the samples are not enough"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class _HedgeBudget(object):
+    """
+    Token bucket which caps the hedge rate. Each query adds `ratio` token,
+    each hedge takes one, so no more than `ratio` of the queries will be hedged.
+    """
+
+    def __init__(self, ratio, burst):
+        self._lock = threading.Lock()
+        self._ratio = ratio
+        self._burst = burst
+        self._tokens = burst
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + self._ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _Attempt(object):
+    """A query running on a connection borrowed from one pool, which can be cancelled"""
+
+    def __init__(self, pool, sql, args):
+        self.pool = pool
+        self._sql = sql
+        self._args = args
+        self._lock = threading.Lock()
+        self._connection = None
+        self._cancelled = False
+        # Set while a kill is being sent, the connection isn't returned to the pool until it's done
+        self._kill_done = threading.Event()
+        self._kill_done.set()
+        self.started = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def elapsed(self):
+        """Seconds since the attempt started, until it finished if it has"""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        self.started.set()
+        try:
+            return self._run()
+        except Exception as err:
+            self.error = err
+            raise
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def _run(self):
+        with self.pool.connection(autocommit=True) as conn:
+            with self._lock:
+                if self._cancelled:
+                    return None
+                self._connection = conn
+
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self._sql, self._args)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+                with self._lock:
+                    self._connection = None
+                # A kill of this query must not hit the next borrower of the connection
+                self._kill_done.wait()
+
+    def cancel(self):
+        """Kill the query if it's running, or skip it if it hasn't started yet"""
+        with self._lock:
+            self._cancelled = True
+            connection = self._connection
+            if connection is None:
+                return
+            self._kill_done.clear()
+
+        # The kill is sent without the lock, it's a round trip on another connection
+        try:
+            self.pool.kill_query(connection)
+        finally:
+            self._kill_done.set()
+
+
+def _spawn(fn):
+    """Run a function in a new daemon thread, return a future of its result"""
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as err:
+            future.set_exception(err)
+
+    thread = threading.Thread(target=target)
+    thread.daemon = True
+    thread.start()
+    return future
+
+
+class HedgedReader(object):
+    """
+    Hedged execution of idempotent reads.
+
+    A query is sent to one pool first, if it doesn't finish within the hedge delay,
+    the same query is sent to another pool, the first answer wins and the other
+    query is killed. The hedge delay is the rolling percentile latency of the query
+    fingerprint, and the hedge rate is capped by `max_hedge_ratio`.
+
+    Only the latencies of the primary queries are recorded, a killed primary records
+    the time it has run, so the percentile isn't biased by the fast hedges.
+    """
+
+    def __init__(self, pools, hedge_percentile=95, hedge_delay=None, min_samples=20,
+                 max_hedge_ratio=0.05, hedge_burst=10, window=200, max_workers=32):
+        """
+        :param pools: list of `MySQLConnectionPool`, usually one per replica.
+                      With a single pool, the hedge runs on another connection of the same pool.
+        :param hedge_percentile: percentile of the latencies used as the hedge delay
+        :param hedge_delay: hedge delay in seconds used until `min_samples` latencies are recorded,
+                            if it's None, queries won't be hedged until then
+        :param min_samples: minimal latencies recorded before the percentile is used
+        :param max_hedge_ratio: maximum ratio of hedged queries, so hedges won't amplify the load
+        :param hedge_burst: maximum hedges in a burst
+        :param window: number of latencies kept for each fingerprint
+        :param max_workers: maximum number of concurrent primary queries. The hedges run on their
+                            own threads, so they are not queued behind the slow primaries,
+                            their number is capped by `max_hedge_ratio`.
+        """
+        self._pools = list(pools)
+        if not self._pools:
+            raise ValueError('At least one pool is required')
+
+        self._hedge_percentile = hedge_percentile
+        self._hedge_delay = hedge_delay
+        self._min_samples = min_samples
+        self._latencies = LatencyTracker(window)
+        self._budget = _HedgeBudget(max_hedge_ratio, hedge_burst)
+        self._next_pool = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # The kills don't queue behind the slow queries they are going to kill
+        self._cancel_executor = ThreadPoolExecutor(max_workers=2)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'queries': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def __repr__(self):
+        return '<HedgedReader pools={!r}, stats={!r}>'.format(len(self._pools), self.stats)
+
+    @property
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def hedge_delay(self, sql):
+        """Return the hedge delay of a query, None if it shouldn't be hedged now"""
+        delay = self._latencies.percentile(fingerprint(sql), self._hedge_percentile, self._min_samples)
+        return delay if delay is not None else self._hedge_delay
+
+    def query(self, sql, args=None):
+        """Execute a read query with hedging, return all the rows"""
+        if not is_idempotent_read(sql):
+            raise ValueError('Only idempotent SELECT queries can be hedged: {!r}'.format(sql))
+
+        key = fingerprint(sql)
+        delay = self.hedge_delay(sql)
+        self._count('queries')
+        self._budget.deposit()
+
+        index = next(self._next_pool)
+        primary = _Attempt(self._pools[index % len(self._pools)], sql, args)
+        attempts = {self._executor.submit(primary.run): primary}
+
+        done = ()
+        if delay is not None:
+            # The hedge delay counts from the start of the primary. If no worker is free
+            # within the delay, the workers are stuck, so it's hedged anyway.
+            if primary.started.wait(delay):
+                remaining = primary.started_at + delay - time.perf_counter()
+                done, _ = wait(attempts, timeout=max(0.0, remaining))
+        if delay is not None and not done and self._budget.withdraw():
+            self._count('hedged')
+            hedge = _Attempt(self._pools[(index + 1) % len(self._pools)], sql, args)
+            attempts[_spawn(hedge.run)] = hedge
+            logger.debug('Hedge query "{}" after {:.3f}s'.format(key, delay))
+
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    rows = future.result()
+                except Exception as err:
+                    error = error or err
+                    continue
+
+                winner = attempts[future]
+                # Recorded before the primary is killed, its latency is at least the time it has run
+                if primary.started_at is not None and primary.error is None:
+                    self._latencies.record(key, primary.elapsed())
+                # Kill the loser in the background, don't delay the winner
+                for other in pending:
+                    self._cancel_executor.submit(attempts[other].cancel)
+                if winner is not primary:
+                    self._count('hedge_wins')
+                return rows
+
+        raise error
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._cancel_executor.shutdown(wait=False)
@@ -0,0 +1,199 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : lanes.py
+# Date   : 2026-10-18 23-20
+# Version: 0.1
+# Description: priority lanes, admission control of the borrowers.
+
+import time
+import logging
+import threading
+from collections import deque
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['PriorityLanes', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW', 'LaneWaitTimeoutError']
+
+PRIORITY_HIGH = 'high'
+PRIORITY_NORMAL = 'normal'
+PRIORITY_LOW = 'low'
+
+DEFAULT_LANE_WEIGHTS = {PRIORITY_HIGH: 4, PRIORITY_NORMAL: 2, PRIORITY_LOW: 1}
+
+
+class LaneWaitTimeoutError(Exception):
+    pass
+
+
+class _Waiter(object):
+    def __init__(self, lane, lock):
+        self.lane = lane
+        self.since = time.monotonic()
+        self.admitted = False
+        self.condition = threading.Condition(lock)
+
+
+class _Lane(object):
+    def __init__(self, name, weight, window):
+        self.name = name
+        self.weight = weight
+        self.current_weight = 0
+        self.waiters = deque()
+        self.in_use = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.wait_times = deque(maxlen=window)
+
+    @property
+    def stats(self):
+        wait_times = sorted(self.wait_times)
+        return {
+            'in_use': self.in_use,
+            'waiting': len(self.waiters),
+            'admitted': self.admitted,
+            'timeouts': self.timeouts,
+            'avg_wait': sum(wait_times) / len(wait_times) if wait_times else 0.0,
+            'p95_wait': wait_times[int(0.95 * (len(wait_times) - 1))] if wait_times else 0.0,
+            'max_wait': wait_times[-1] if wait_times else 0.0,
+        }
+
+
+class PriorityLanes(object):
+    """
+    Admission control of the borrowers with priority lanes.
+
+    - The highest priority lane may use all the capacity, the other lanes can't
+      use the last `reserved` connections.
+    - When the capacity is used up, borrowers wait in their lanes, a released slot is
+      given to the lanes by smooth weighted round robin.
+    - A borrower that has waited longer than `starvation_timeout` is served first.
+    """
+
+    def __init__(self, capacity, reserved=0, weights=None, starvation_timeout=1.0, window=1000,
+                 default_priority=PRIORITY_NORMAL):
+        """
+        :param capacity: callable returning the maximum number of borrowed connections
+        :param reserved: number of connections reserved for the highest priority lane
+        :param weights: dict of lane name to its weight, the first lane with the biggest weight
+                        is the highest priority. Default is `{'high': 4, 'normal': 2, 'low': 1}`.
+        :param starvation_timeout: seconds after which a waiter is served regardless of the weights
+        :param window: number of wait times kept for the statistics of each lane
+        :param default_priority: lane of the borrowers without a priority, it must be one of the lanes
+        """
+        weights = weights or DEFAULT_LANE_WEIGHTS
+        if default_priority not in weights:
+            raise ValueError('Invalid default_priority {!r}, must be one of {}'.format(default_priority,
+                                                                                      sorted(weights)))
+        self._capacity = capacity
+        self._reserved = reserved
+        self._starvation_timeout = starvation_timeout
+        self._lanes = {name: _Lane(name, weight, window) for name, weight in weights.items()}
+        self._high_lane = max(weights, key=lambda name: weights[name])
+        self._default_priority = default_priority
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiting = 0
+
+    def __repr__(self):
+        return '<PriorityLanes in_use={}, waiting={}, reserved={}>'.format(self._in_use, self._waiting,
+                                                                           self._reserved)
+
+    def _lane(self, name):
+        try:
+            return self._lanes[name]
+        except KeyError:
+            raise ValueError('Unknown priority {!r}, must be one of {}'.format(name, sorted(self._lanes)))
+
+    @property
+    def high_lane(self):
+        return self._high_lane
+
+    @property
+    def default_priority(self):
+        return self._default_priority
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {name: lane.stats for name, lane in self._lanes.items()}
+
+    def _can_admit(self, lane):
+        limit = self._capacity()
+        if lane.name != self._high_lane:
+            limit -= self._reserved
+        return self._in_use < limit
+
+    def _admit(self, lane, wait_time):
+        self._in_use += 1
+        lane.in_use += 1
+        lane.admitted += 1
+        lane.wait_times.append(wait_time)
+
+    def acquire(self, priority, timeout=None):
+        """Block until the lane is admitted to borrow a connection"""
+        lane = self._lane(priority)
+        with self._lock:
+            if not self._waiting and self._can_admit(lane):
+                self._admit(lane, 0.0)
+                return
+
+            waiter = _Waiter(lane, self._lock)
+            lane.waiters.append(waiter)
+            self._waiting += 1
+            deadline = None if timeout is None else waiter.since + timeout
+            self._dispatch()
+
+            while not waiter.admitted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    lane.waiters.remove(waiter)
+                    self._waiting -= 1
+                    lane.timeouts += 1
+                    raise LaneWaitTimeoutError('No connection is available for priority {!r} '
+                                               'in {}s'.format(priority, timeout))
+                waiter.condition.wait(remaining)
+
+    def release(self, priority):
+        """Release a slot of the lane and hand it over to the waiters"""
+        lane = self._lane(priority)
+        with self._lock:
+            self._in_use -= 1
+            lane.in_use -= 1
+            self._dispatch()
+
+    def _dispatch(self):
+        while self._waiting:
+            lane = self._next_lane()
+            if lane is None:
+                return
+
+            waiter = lane.waiters.popleft()
+            self._waiting -= 1
+            waiter.admitted = True
+            self._admit(lane, time.monotonic() - waiter.since)
+            waiter.condition.notify()
+
+    def _next_lane(self):
+        """Select the lane to admit next, None if no waiter can be admitted"""
+        candidates = [lane for lane in self._lanes.values() if lane.waiters and self._can_admit(lane)]
+        if not candidates:
+            return None
+
+        # The oldest starving waiter goes first
+        now = time.monotonic()
+        starving = [lane for lane in candidates if now - lane.waiters[0].since >= self._starvation_timeout]
+        if starving:
+            return min(starving, key=lambda lane: lane.waiters[0].since)
+
+        # Smooth weighted round robin
+        total = 0
+        for lane in candidates:
+            lane.current_weight += lane.weight
+            total += lane.weight
+        selected = max(candidates, key=lambda lane: lane.current_weight)
+        selected.current_weight -= total
+        return selected
@@ -0,0 +1,188 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : loader.py
+# Date   : 2026-10-18 18-20
+# Version: 0.1
+# Description: streaming bulk loader with `LOAD DATA LOCAL INFILE`.
+
+import time
+import logging
+import datetime
+import threading
+from queue import Queue
+from collections import namedtuple
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['LoadResult', 'load_rows', 'serialize_rows', 'load_data_sql']
+
+LoadResult = namedtuple('LoadResult', ['rows', 'seconds', 'rows_per_second', 'warnings'])
+
+# Field and line terminators of the stream, as well as the escape character itself
+_escapes = [(b'\\', b'\\\\'), (b'\t', b'\\t'), (b'\n', b'\\n'), (b'\r', b'\\r'), (b'\x00', b'\\0')]
+
+_end_of_stream = object()
+
+
+def _quote_identifier(name):
+    return '.'.join('`{}`'.format(part.replace('`', '``')) for part in name.split('.'))
+
+
+def load_data_sql(table, columns):
+    """Return the `LOAD DATA` statement matching the stream of `serialize_rows`"""
+    return "LOAD DATA LOCAL INFILE 'pymysqlpool.stream' INTO TABLE {} CHARACTER SET utf8mb4 " \
+           "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({})".format(
+               _quote_identifier(table), ', '.join(_quote_identifier(c) for c in columns))
+
+
+def _escape_value(value):
+    if value is None:
+        return b'\\N'
+    if isinstance(value, bool):
+        return b'1' if value else b'0'
+    if isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    elif isinstance(value, datetime.timedelta):
+        # `[-]HH:MM:SS[.ffffff]`, TIME(n) keeps the fractional seconds
+        sign = '-' if value < datetime.timedelta(0) else ''
+        value = abs(value)
+        text = '{}{:02d}:{:02d}:{:02d}'.format(sign, value.days * 24 + value.seconds // 3600,
+                                               value.seconds // 60 % 60, value.seconds % 60)
+        if value.microseconds:
+            text += '.{:06d}'.format(value.microseconds)
+        data = text.encode('utf-8')
+    else:
+        data = str(value).encode('utf-8')
+
+    for char, escaped in _escapes:
+        if char in data:
+            data = data.replace(char, escaped)
+    return data
+
+
+def serialize_rows(rows, chunk_size=64 * 1024):
+    """Serialize rows into chunks of escaped tab-separated lines, a line is never split across chunks.
+
+    :param rows: iterable of row tuples
+    :param chunk_size: chunk size in bytes, a single line bigger than it makes a bigger chunk
+    :return: generator of bytes
+    """
+    buffer = []
+    size = 0
+    for row in rows:
+        line = b'\t'.join(_escape_value(value) for value in row) + b'\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _load_one(pool, sql, chunks):
+    """Load the chunks over a dedicated connection in a transaction, return `(rows, warnings)`"""
+    backend = pool._backend
+    # The connection with the LOCAL_FILES capability is out of the pool, a `LOAD DATA LOCAL INFILE`
+    # of another borrower on it would break its protocol state
+    conn = pool._create_connection(local_infile=True)
+    try:
+        backend.set_autocommit(conn, False)
+        try:
+            rows, warning_count = backend.load_local_stream(conn, sql, chunks)
+            warnings = []
+            if warning_count:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute('SHOW WARNINGS')
+                    warnings = list(cursor.fetchall())
+                finally:
+                    cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    return rows, warnings
+
+
+def load_rows(pool, table, columns, rows, parallel=1, chunk_size=64 * 1024):
+    """Stream rows into a table with `LOAD DATA LOCAL INFILE`, no temporary file is written.
+
+    With `parallel` > 1, the chunks are shared by several connections, each of them loads
+    its part in its own transaction, so the whole load is not atomic any more.
+
+    :return: a `LoadResult`
+    """
+    sql = load_data_sql(table, columns)
+    start = time.perf_counter()
+
+    if parallel <= 1:
+        loaded, warnings = _load_one(pool, sql, serialize_rows(rows, chunk_size))
+    else:
+        loaded, warnings = _load_parallel(pool, sql, rows, parallel, chunk_size)
+
+    seconds = time.perf_counter() - start
+    result = LoadResult(loaded, seconds, loaded / seconds if seconds else 0.0, warnings)
+    logger.info('[{}] Loaded {} rows into {} in {:.3f}s ({:.0f} rows/s), {} warnings'.format(
+        pool, loaded, table, seconds, result.rows_per_second, len(warnings)))
+    return result
+
+
+def _load_parallel(pool, sql, rows, parallel, chunk_size):
+    # A bounded queue keeps the memory usage flat when the producer is faster than the loaders
+    chunks = Queue(maxsize=parallel * 2)
+    aborted = threading.Event()
+    results = []
+    errors = []
+
+    def consume(state):
+        while True:
+            chunk = chunks.get()
+            if chunk is _end_of_stream:
+                state['finished'] = True
+            if aborted.is_set():
+                raise RuntimeError('Load is aborted')
+            if state['finished']:
+                return
+            yield chunk
+
+    def worker():
+        state = {'finished': False}
+        try:
+            results.append(_load_one(pool, sql, consume(state)))
+        except Exception as err:
+            errors.append(err)
+            aborted.set()
+            # Drain the queue so the producer won't be blocked forever
+            while not state['finished']:
+                state['finished'] = chunks.get() is _end_of_stream
+
+    threads = [threading.Thread(target=worker) for _ in range(parallel)]
+    for t in threads:
+        t.start()
+
+    try:
+        for chunk in serialize_rows(rows, chunk_size):
+            if aborted.is_set():
+                break
+            chunks.put(chunk)
+    except Exception as err:
+        errors.insert(0, err)
+        aborted.set()
+    finally:
+        for _ in threads:
+            chunks.put(_end_of_stream)
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
+    return sum(r for r, _ in results), [w for _, warnings in results for w in warnings]
@@ -7,8 +7,11 @@
 # Description: pool container, thread-safe
 
 
+import time
 import logging
+import itertools
 import threading
+from collections import deque
 from queue import Queue, Empty
 
 __version__ = '0.1'
@@ -16,7 +19,7 @@ __author__ = 'Chris'
 
 logger = logging.getLogger('pymysqlpool')
 
-__all__ = ['PoolContainer', 'PoolIsEmptyException', 'PoolIsFullException']
+__all__ = ['PoolContainer', 'StripedPoolContainer', 'PoolIsEmptyException', 'PoolIsFullException']
 
 
 class PoolIsFullException(Exception):
@@ -80,6 +83,16 @@ class PoolContainer(object):
             'Add item "{!r}",'
             ' current size is "{}"'.format(item, self.size))
 
+    def remove(self, item):
+        """Remove a borrowed item from the pool, so that a new one can take its place"""
+        with self._pool_lock:
+            if item not in self._pool_items:
+                return False
+            self._pool_items.discard(item)
+
+        logger.debug('Remove item "{!r}", current size is "{}"'.format(item, self.size))
+        return True
+
     def return_(self, item):
         """Return a item to the pool. Note that the item to be returned should exist in this pool"""
         if item is None:
@@ -131,3 +144,116 @@ class PoolContainer(object):
     def free_size(self):
         """Not reliable as described in document of the `queue` module"""
         return self._free_items.qsize()
+
+
+class StripedPoolContainer(PoolContainer):
+    """
+    Pool container with several free lists(stripes).
+    Each thread is bound to one stripe, it takes free items from its own stripe first
+    and steals from the other stripes when it's empty, so the borrowers don't contend
+    on a single queue. The `max_pool_size` is still global.
+    """
+
+    def __init__(self, max_pool_size, stripes=4):
+        if stripes < 1:
+            raise ValueError('Invalid stripes {}, must be bigger than 0'.format(stripes))
+        super(StripedPoolContainer, self).__init__(max_pool_size)
+        # `deque.append` and `deque.popleft` are thread-safe, no lock is needed on the fast path
+        self._stripes = [deque() for _ in range(stripes)]
+        self._next_stripe = itertools.count()
+        self._local = threading.local()
+        # Only used when a borrower has to wait
+        self._available = threading.Condition(threading.Lock())
+        self._waiters = 0
+
+    def __contains__(self, item):
+        # Membership test of a set is atomic, skip the pool lock
+        return item in self._pool_items
+
+    def _stripe_index(self):
+        try:
+            return self._local.index
+        except AttributeError:
+            self._local.index = next(self._next_stripe) % len(self._stripes)
+            return self._local.index
+
+    def _put(self, item):
+        self._stripes[self._stripe_index()].append(item)
+        if self._waiters:
+            with self._available:
+                self._available.notify()
+
+    def _take(self):
+        index = self._stripe_index()
+        count = len(self._stripes)
+        for i in range(count):
+            try:
+                return self._stripes[(index + i) % count].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def add(self, item):
+        """Add a new item to the pool"""
+        if item is None:
+            return None
+
+        with self._pool_lock:
+            if item in self._pool_items:
+                logger.debug(
+                    'Duplicate item found "{}", '
+                    'current size is "{}"'.format(item, self.size))
+                return None
+
+            if len(self._pool_items) >= self.max_pool_size:
+                raise PoolIsFullException()
+            self._pool_items.add(item)
+
+        self._put(item)
+        logger.debug(
+            'Add item "{!r}",'
+            ' current size is "{}"'.format(item, self.size))
+
+    def return_(self, item):
+        """Return a item to the pool. Note that the item to be returned should exist in this pool"""
+        if item is None:
+            return False
+
+        if item not in self:
+            logger.error(
+                'Current pool dose not contain item: "{}"'.format(item))
+            return False
+
+        self._put(item)
+        return True
+
+    def get(self, block=True, wait_timeout=60):
+        """Block until a free item is found in `wait_timeout` seconds.
+        Otherwise, a `PoolIsEmptyException` will be raised.
+
+        If `wait_timeout` is None, it will block forever until a free item is found.
+        """
+        item = self._take()
+        if item is None and block:
+            deadline = None if wait_timeout is None else time.monotonic() + wait_timeout
+            with self._available:
+                self._waiters += 1
+                try:
+                    while True:
+                        item = self._take()
+                        if item is not None:
+                            break
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            break
+                        self._available.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+        if item is None:
+            raise PoolIsEmptyException('Cannot find any available item')
+        return item
+
+    @property
+    def free_size(self):
+        return sum(len(stripe) for stripe in self._stripes)
@@ -0,0 +1,255 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : router.py
+# Date   : 2026-10-18 10-30
+# Version: 0.1
+# Description: shard router, one connection pool per shard.
+
+import bisect
+import hashlib
+import logging
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from pymysqlpool.connection import MySQLConnectionPool
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['ShardRouter', 'ConsistentHashRing', 'RangeShardMap', 'UnknownShardError']
+
+
+class UnknownShardError(Exception):
+    pass
+
+
+def _md5_hash(key):
+    digest = hashlib.md5(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class ConsistentHashRing(object):
+    """
+    Map a shard key to a shard name with consistent hashing.
+    Each shard is placed on the ring `replicas` times, so adding or removing
+    a shard only moves the keys next to its points.
+
+    The ring can be changed while it's in use, a new ring is built and swapped in
+    as a whole, so `get_shard` always sees a consistent ring.
+    """
+
+    def __init__(self, shards, replicas=128, hash_func=None):
+        """
+        :param shards: iterable of shard names
+        :param replicas: number of virtual nodes per shard
+        :param hash_func: callable mapping any key to an int, default is md5 based
+        """
+        self._replicas = replicas
+        self._hash_func = hash_func or _md5_hash
+        self._lock = threading.Lock()
+        # Tuple of the sorted points and their shards, replaced together
+        self._ring = ([], [])
+        self._shards = set()
+
+        for shard in shards:
+            self.add_shard(shard)
+
+    def __repr__(self):
+        return '<{} shards={}>'.format(self.__class__.__name__, sorted(self._shards))
+
+    @property
+    def shards(self):
+        with self._lock:
+            return set(self._shards)
+
+    def add_shard(self, shard):
+        with self._lock:
+            if shard in self._shards:
+                return
+
+            ring_keys, ring_shards = list(self._ring[0]), list(self._ring[1])
+            for i in range(self._replicas):
+                point = self._hash_func('{}#{}'.format(shard, i))
+                index = bisect.bisect(ring_keys, point)
+                ring_keys.insert(index, point)
+                ring_shards.insert(index, shard)
+            self._ring = (ring_keys, ring_shards)
+            self._shards.add(shard)
+
+    def remove_shard(self, shard):
+        with self._lock:
+            if shard not in self._shards:
+                return
+
+            points = [(k, s) for k, s in zip(*self._ring) if s != shard]
+            self._ring = ([k for k, _ in points], [s for _, s in points])
+            self._shards.discard(shard)
+
+    def get_shard(self, key):
+        ring_keys, ring_shards = self._ring
+        if not ring_keys:
+            raise UnknownShardError('No shard is available in the hash ring')
+
+        index = bisect.bisect(ring_keys, self._hash_func(key))
+        if index == len(ring_keys):
+            index = 0
+        return ring_shards[index]
+
+
+class RangeShardMap(object):
+    """
+    Map a shard key to a shard name by ranges.
+    `ranges` is a list of `(upper_bound, shard)`, a key belongs to the first
+    range whose upper bound is bigger than the key. Use `None` as the last
+    upper bound to catch all the remaining keys.
+    """
+
+    def __init__(self, ranges):
+        ranges = list(ranges)
+        self._catch_all = None
+        if ranges and ranges[-1][0] is None:
+            self._catch_all = ranges.pop()[1]
+        if any(bound is None for bound, _ in ranges):
+            raise ValueError('Only the last range can use `None` as its upper bound')
+
+        ranges.sort(key=lambda r: r[0])
+        self._bounds = [bound for bound, _ in ranges]
+        self._range_shards = [shard for _, shard in ranges]
+
+    def __repr__(self):
+        return '<{} shards={}>'.format(self.__class__.__name__, sorted(self.shards))
+
+    @property
+    def shards(self):
+        shards = set(self._range_shards)
+        if self._catch_all is not None:
+            shards.add(self._catch_all)
+        return shards
+
+    def get_shard(self, key):
+        index = bisect.bisect_right(self._bounds, key)
+        if index < len(self._bounds):
+            return self._range_shards[index]
+        if self._catch_all is not None:
+            return self._catch_all
+        raise UnknownShardError('Key {!r} is out of all shard ranges'.format(key))
+
+
+class ShardRouter(object):
+    """
+    A shard router which owns one connection pool per shard.
+
+    Pools are created lazily on the first borrow and start with a small `max_pool_size`,
+    they will grow with the auto resize feature of `MySQLConnectionPool`, so
+    rarely used shards won't hold idle connections.
+    """
+
+    def __init__(self, router_name, shards, shard_map=None, shard_pool_size=1, **kwargs):
+        """
+        :param router_name: a unique name for this router, used as the prefix of the pool names
+        :param shards: dict of shard name to its connection config(host, port, database...),
+                       the config overrides the common keyword arguments
+        :param shard_map: an object with a `get_shard(key)` method, such as `ConsistentHashRing`
+                          or `RangeShardMap`. Default is a `ConsistentHashRing` of all the shards.
+        :param shard_pool_size: initial `max_pool_size` of each shard pool
+        :param kwargs: common keyword arguments passed to each `MySQLConnectionPool`
+        """
+        self._router_name = router_name
+        self._shard_configs = dict(shards)
+        self._shard_map = shard_map or ConsistentHashRing(self._shard_configs)
+        self._shard_pool_size = shard_pool_size
+        self._common_kwargs = kwargs
+        self._pools = {}
+        self.__safe_lock = threading.RLock()
+        # A cold shard is connected under its own lock, so a slow shard won't block the others
+        self._shard_locks = {shard: threading.Lock() for shard in self._shard_configs}
+
+        unknown = set(getattr(self._shard_map, 'shards', ())) - set(self._shard_configs)
+        if unknown:
+            raise UnknownShardError('Shards {} are not configured'.format(sorted(unknown)))
+
+    def __repr__(self):
+        return '<ShardRouter name={!r}, shards={!r}, connected={!r}>'.format(
+            self._router_name, len(self._shard_configs), sorted(self._pools))
+
+    @property
+    def router_name(self):
+        return self._router_name
+
+    @property
+    def shards(self):
+        return list(self._shard_configs)
+
+    def shard_for(self, shard_key):
+        """Return the shard name of the `shard_key`"""
+        shard = self._shard_map.get_shard(shard_key)
+        if shard not in self._shard_configs:
+            raise UnknownShardError('Shard {!r} is not configured'.format(shard))
+        return shard
+
+    def pool(self, shard):
+        """Return the connection pool of a shard, create it on the first call"""
+        pool = self._pools.get(shard)
+        if pool is not None:
+            return pool
+
+        if shard not in self._shard_configs:
+            raise UnknownShardError('Shard {!r} is not configured'.format(shard))
+
+        with self._shard_locks[shard]:
+            pool = self._pools.get(shard)
+            if pool is None:
+                config = dict(self._common_kwargs)
+                config.setdefault('max_pool_size', self._shard_pool_size)
+                config.update(self._shard_configs[shard])
+                config['pool_name'] = '{}.{}'.format(self._router_name, shard)
+                logger.info('[{}] Create pool for shard "{}"'.format(self, shard))
+                pool = MySQLConnectionPool(**config)
+                with self.__safe_lock:
+                    self._pools[shard] = pool
+            return pool
+
+    @contextlib.contextmanager
+    def connection(self, shard_key, autocommit=False):
+        with self.pool(self.shard_for(shard_key)).connection(autocommit) as conn:
+            yield conn
+
+    @contextlib.contextmanager
+    def cursor(self, shard_key, cursor=None):
+        with self.pool(self.shard_for(shard_key)).cursor(cursor) as cur:
+            yield cur
+
+    def scatter_gather(self, sql, args=None, shards=None, max_workers=None):
+        """Execute the same query on each shard concurrently,
+        each shard borrows a connection from its own pool.
+
+        :param sql: the query to execute
+        :param args: arguments of the query
+        :param shards: shard names to query, None for all the shards
+        :param max_workers: number of concurrent borrows, default is one per shard
+        :return: dict of shard name to the fetched rows
+        """
+        shards = list(self._shard_configs if shards is None else shards)
+        if not shards:
+            return {}
+
+        def query(shard):
+            with self.pool(shard).cursor() as cur:
+                cur.execute(sql, args)
+                return cur.fetchall()
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(shards)) as executor:
+            futures = [(shard, executor.submit(query, shard)) for shard in shards]
+            return {shard: future.result() for shard, future in futures}
+
+    def close(self):
+        """Close all the shard pools"""
+        with self.__safe_lock:
+            pools, self._pools = self._pools, {}
+
+        for pool in pools.values():
+            pool.close()
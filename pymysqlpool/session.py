@@ -0,0 +1,141 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : session.py
+# Date   : 2026-10-18 21-00
+# Version: 0.1
+# Description: track the session state of pooled connections.
+
+import re
+import logging
+
+__version__ = '0.1'
+__author__ = 'Chris'
+
+logger = logging.getLogger('pymysqlpool')
+
+__all__ = ['SessionState', 'SessionTrackingMixin', 'tracking_class']
+
+# The first two keywords of a statement, leading comments and parentheses are skipped
+_keywords_pattern = re.compile(r'\s*(?:(?:/\*.*?\*/|#[^\n]*\n|--[^\n]*\n|\()\s*)*(\w+)(?:\s+(\w+))?', re.S)
+_user_lock_pattern = re.compile(r'\bget_lock\s*\(', re.I)
+# `SELECT ... INTO @a` and `SELECT @a := 1` assign user variables
+_assignment_pattern = re.compile(r'\bINTO\s+@|:=', re.I)
+
+_begin_keywords = {'BEGIN', 'START'}
+_end_keywords = {'COMMIT', 'ROLLBACK'}
+# A procedure may change anything in the session
+_session_keywords = {'SET', 'USE', 'PREPARE', 'LOCK', 'HANDLER', 'CALL'}
+
+_tracking_classes = {}
+
+
+class SessionState(object):
+    """
+    Dirty state of a connection session, which should be reset before the connection
+    is borrowed by others.
+    """
+
+    def __init__(self):
+        self.in_transaction = False
+        self.session_changed = False
+        self.database_changed = False
+
+    def __repr__(self):
+        return '<SessionState in_transaction={}, session_changed={}>'.format(self.in_transaction,
+                                                                             self.session_changed)
+
+    @property
+    def dirty(self):
+        return self.in_transaction or self.session_changed
+
+    def clear(self):
+        self.in_transaction = False
+        self.session_changed = False
+        self.database_changed = False
+
+    def observe(self, sql, autocommit):
+        """Update the state with a statement about to be executed"""
+        if isinstance(sql, (bytes, bytearray)):
+            sql = bytes(sql[:256]).decode('latin-1')
+
+        match = _keywords_pattern.match(sql, 0, 256)
+        if match is None:
+            return
+        first, second = match.group(1).upper(), (match.group(2) or '').upper()
+
+        if first in _end_keywords:
+            # `ROLLBACK TO SAVEPOINT` keeps the transaction open
+            if second != 'TO':
+                self.in_transaction = False
+            return
+
+        if first in _begin_keywords:
+            self.in_transaction = True
+        elif first in _session_keywords or (first == 'CREATE' and second == 'TEMPORARY'):
+            self.session_changed = True
+            self.database_changed = self.database_changed or first == 'USE'
+        elif first in ('SELECT', 'DO') and (_user_lock_pattern.search(sql) or _assignment_pattern.search(sql)):
+            self.session_changed = True
+
+        if not autocommit:
+            self.in_transaction = True
+
+
+class SessionTrackingMixin(object):
+    """
+    Mixin of the driver connection classes, it marks the session as dirty
+    when a statement changes the session or runs in a transaction.
+
+    `statement_guard` is a hook of the borrow deadline, its `enter()` is called before
+    a statement is sent and may refuse it, `exit()` after the statement is finished.
+    """
+    statement_guard = None
+
+    def __init__(self, *args, **kwargs):
+        self.session_state = SessionState()
+        super(SessionTrackingMixin, self).__init__(*args, **kwargs)
+        # Statements executed while connecting, e.g. `init_command`, belong to every borrower
+        self.session_state.clear()
+
+    def query(self, sql, *args, **kwargs):
+        guard = self.statement_guard
+        if guard is not None:
+            guard.enter()
+        try:
+            self.session_state.observe(sql, self.get_autocommit())
+            return super(SessionTrackingMixin, self).query(sql, *args, **kwargs)
+        finally:
+            if guard is not None:
+                guard.exit()
+
+    def select_db(self, db):
+        self.session_state.session_changed = True
+        self.session_state.database_changed = True
+        return super(SessionTrackingMixin, self).select_db(db)
+
+    def begin(self):
+        # pymysql sends BEGIN without `query()`
+        self.session_state.in_transaction = True
+        return super(SessionTrackingMixin, self).begin()
+
+    def commit(self):
+        result = super(SessionTrackingMixin, self).commit()
+        self.session_state.in_transaction = False
+        return result
+
+    def rollback(self):
+        result = super(SessionTrackingMixin, self).rollback()
+        self.session_state.in_transaction = False
+        return result
+
+
+def tracking_class(connection_class):
+    """Return a subclass of the driver connection class with session tracking"""
+    try:
+        return _tracking_classes[connection_class]
+    except KeyError:
+        cls = type('Pooled{}'.format(connection_class.__name__),
+                   (SessionTrackingMixin, connection_class), {})
+        _tracking_classes[connection_class] = cls
+        return cls
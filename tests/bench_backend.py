@@ -0,0 +1,80 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : bench_backend.py
+# Date   : 2026-10-18 15-40
+# Version: 0.1
+# Description: compare rows decoded per second of each driver backend.
+
+import datetime
+import time
+
+from pymysqlpool.backend import FakeBackend, DriverNotFoundError
+from pymysqlpool.connection import MySQLConnectionPool
+
+config = {
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'root',
+    'password': 'chris',
+    'database': 'test',
+}
+
+row_count = 100000
+repeat = 5
+
+create_sql = 'CREATE TABLE IF NOT EXISTS bench_rows (' \
+             'id INT PRIMARY KEY, name VARCHAR(32), score DOUBLE, create_at DATETIME)'
+insert_sql = 'INSERT INTO bench_rows (id, name, score, create_at) VALUES (%s, %s, %s, %s)'
+select_sql = 'SELECT id, name, score, create_at FROM bench_rows'
+
+
+def make_rows():
+    now = datetime.datetime.now()
+    return [(i, 'name_{}'.format(i), i * 1.5, now) for i in range(row_count)]
+
+
+def prepare_table():
+    pool = MySQLConnectionPool('bench_prepare', **config)
+    with pool.cursor() as cursor:
+        cursor.execute(create_sql)
+        cursor.execute('TRUNCATE bench_rows')
+        rows = make_rows()
+        for i in range(0, len(rows), 5000):
+            cursor.executemany(insert_sql, rows[i:i + 5000])
+    pool.close()
+
+
+def bench(name, driver, use_dict_cursor):
+    pool = MySQLConnectionPool('bench_{}'.format(name), driver=driver,
+                               use_dict_cursor=use_dict_cursor, **config)
+    decoded = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with pool.cursor() as cursor:
+            cursor.execute(select_sql)
+            decoded += len(cursor.fetchall())
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return decoded / elapsed
+
+
+def main():
+    rows = make_rows()
+    drivers = [('pymysql', 'pymysql'), ('mysqldb', 'mysqldb'),
+               ('fake', FakeBackend(lambda connection, sql, args: list(rows)))]
+
+    prepare_table()
+    print('{:<10}{:>12}{:>20}'.format('backend', 'cursor', 'rows/second'))
+    for name, driver in drivers:
+        for use_dict_cursor in (False, True):
+            try:
+                rate = bench(name, driver, use_dict_cursor)
+            except DriverNotFoundError as err:
+                print('{:<10}{:>12}{:>20}'.format(name, '-', 'skipped: {}'.format(err)))
+                break
+            print('{:<10}{:>12}{:>20,.0f}'.format(name, 'dict' if use_dict_cursor else 'tuple', rate))
+
+
+if __name__ == '__main__':
+    main()
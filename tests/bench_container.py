@@ -0,0 +1,64 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : bench_container.py
+# Date   : 2026-10-18 20-10
+# Version: 0.1
+# Description: borrow throughput of the pool containers under contention.
+
+import os
+import sys
+import threading
+import time
+
+from pymysqlpool.pool import PoolContainer, StripedPoolContainer
+
+pool_size = 64
+duration = 1.0
+thread_counts = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+def bench(container, threads):
+    for i in range(pool_size):
+        container.add(i)
+
+    go = threading.Event()
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def borrower(index):
+        get, return_ = container.get, container.return_
+        n = 0
+        go.wait()
+        while not stop.is_set():
+            item = get(True, None)
+            return_(item)
+            n += 1
+        counts[index] = n
+
+    workers = [threading.Thread(target=borrower, args=(i,)) for i in range(threads)]
+    # Start all the threads before borrowing, busy borrowers would slow down the thread creation
+    for t in workers:
+        t.start()
+    start = time.perf_counter()
+    go.set()
+    time.sleep(duration)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    stripes = os.cpu_count() or 4
+    print('python {}, gil={}, cpus={}, pool_size={}'.format(sys.version.split()[0], gil, stripes, pool_size))
+    print('{:>8}{:>20}{:>20}'.format('threads', 'queue borrows/s', 'striped borrows/s'))
+    for threads in thread_counts:
+        queue_rate = bench(PoolContainer(pool_size), threads)
+        striped_rate = bench(StripedPoolContainer(pool_size, stripes), threads)
+        print('{:>8}{:>20,.0f}{:>20,.0f}'.format(threads, queue_rate, striped_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_backend.py
+# Date   : 2026-10-18 15-05
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+import threading
+import time
+
+from pymysqlpool.backend import *
+from pymysqlpool.connection import MySQLConnectionPool, QueryTimeoutError
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.ERROR)
+
+
+def query_handler(connection, sql, args):
+    if sql.startswith('SELECT SLEEP'):
+        time.sleep(0.3)
+        return [{'SLEEP(0.3)': 1}]
+    if sql.startswith('SELECT'):
+        return [{'id': i, 'name': 'user_{}'.format(i)} for i in range(3)]
+    return []
+
+
+def fake_pool(pool_name='test_fake'):
+    return MySQLConnectionPool(pool_name, driver=FakeBackend(query_handler), max_pool_size=4)
+
+
+def test_get_backend():
+    backend = FakeBackend()
+    assert get_backend(backend) is backend
+    assert isinstance(get_backend('fake'), FakeBackend)
+
+    try:
+        get_backend('unknown')
+    except DriverNotFoundError:
+        pass
+    else:
+        assert False
+
+
+def test_cursor_class_resolved():
+    import pymysql.cursors
+    backend = PyMySQLBackend()
+    assert backend.cursor_class() is pymysql.cursors.Cursor
+    assert backend.cursor_class(dict_cursor=True, streaming=True) is pymysql.cursors.SSDictCursor
+
+    # A standard cursor class of another driver, e.g. `MySQLdb.cursors.SSCursor`
+    class SSCursor(object):
+        pass
+
+    assert backend.resolve_cursor(SSCursor) is pymysql.cursors.SSCursor
+    assert backend.resolve_cursor(pymysql.cursors.DictCursor) is pymysql.cursors.DictCursor
+    assert FakeBackend().cursor_class(streaming=True) is None
+
+
+def test_fake_pool_cursor():
+    pool = fake_pool()
+    with pool.cursor() as cursor:
+        cursor.execute('SELECT * FROM user')
+        rows = cursor.fetchall()
+    assert len(rows) == 3
+    assert pool.free_size == pool.pool_size
+
+
+def test_fake_pool_autocommit_restored():
+    pool = fake_pool()
+    with pool.connection(autocommit=True) as conn:
+        assert conn.get_autocommit() is True
+    with pool.connection() as conn:
+        assert conn.get_autocommit() is False
+
+
+def test_fake_pool_dead_connection_replaced():
+    pool = fake_pool()
+    with pool.connection() as conn:
+        dead = conn
+    dead.open = False
+    dead.ping = lambda reconnect=True: (_ for _ in ()).throw(ConnectionError('gone'))
+
+    with pool.connection() as conn:
+        assert conn is not dead
+    assert dead not in list(pool)
+
+
+def test_fake_pool_with_multi_threads():
+    pool = fake_pool()
+
+    def task():
+        for _ in range(100):
+            with pool.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+    threads = [threading.Thread(target=task) for _ in range(10)]
+    [t.start() for t in threads]
+    [t.join() for t in threads]
+    assert pool.free_size == pool.pool_size
+
+
+def test_fake_pool_deadline_kills_running_query():
+    pool = fake_pool('test_fake_deadline')
+    try:
+        with pool.cursor(timeout=0.1) as cursor:
+            cursor.execute('SELECT SLEEP(0.3)')
+    except QueryTimeoutError:
+        pass
+    else:
+        assert False
+
+    kills = [sql for conn in pool._backend.connections for sql, _ in conn.queries if sql.startswith('KILL')]
+    assert len(kills) == 1
+
+
+def test_fake_pool_deadline_between_statements():
+    pool = fake_pool('test_fake_deadline')
+    # The write is committed before the deadline, it must not be reported as failed
+    with pool.connection(timeout=0.1) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute('INSERT INTO user (name) VALUES (%s)', ('Jerry',))
+        conn.commit()
+        time.sleep(0.3)
+
+    # But the deadline still holds for the statements after it
+    start = time.perf_counter()
+    try:
+        with pool.cursor(timeout=0.1) as cursor:
+            time.sleep(0.2)
+            cursor.execute('SELECT SLEEP(0.3)')
+    except QueryTimeoutError:
+        pass
+    else:
+        assert False
+    assert time.perf_counter() - start < 0.3
+
+    queries = [sql for conn in pool._backend.connections for sql, _ in conn.queries]
+    assert not [sql for sql in queries if sql.startswith('KILL')]
+    assert 'SELECT SLEEP(0.3)' not in queries
+    assert pool.free_size == pool.pool_size
+
+
+if __name__ == '__main__':
+    test_get_backend()
+    test_cursor_class_resolved()
+    test_fake_pool_cursor()
+    test_fake_pool_with_multi_threads()
+    test_fake_pool_deadline_kills_running_query()
+    test_fake_pool_deadline_between_statements()
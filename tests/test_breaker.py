@@ -0,0 +1,133 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_breaker.py
+# Date   : 2026-10-18 22-50
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+import threading
+import time
+
+from pymysqlpool.backend import FakeBackend
+from pymysqlpool.breaker import *
+from pymysqlpool.connection import MySQLConnectionPool
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.CRITICAL)
+
+
+class FlakyBackend(FakeBackend):
+    """A fake backend whose server can be taken down"""
+
+    def __init__(self):
+        super(FlakyBackend, self).__init__()
+        self.down = False
+        self.attempts = 0
+
+    def connect(self, *args, **kwargs):
+        if self.down:
+            self.attempts += 1
+            time.sleep(0.05)
+            raise ConnectionError('Server is down')
+        return super(FlakyBackend, self).connect(*args, **kwargs)
+
+
+def kill_connections(pool):
+    for conn in list(pool):
+        conn.close()
+        conn.ping = lambda reconnect=False: (_ for _ in ()).throw(ConnectionError('Connection is lost'))
+
+
+def test_breaker_states():
+    breaker = CircuitBreaker(backoff=0.05, max_backoff=1, jitter=0)
+    assert breaker.acquire()
+    assert not breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.is_open
+    assert not breaker.acquire()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.acquire()
+    breaker.record_failure()
+    # Backoff is doubled
+    assert 0.09 < breaker.retry_after() <= 0.1
+
+    time.sleep(0.11)
+    assert breaker.acquire()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_pool_fail_fast():
+    backend = FlakyBackend()
+    pool = MySQLConnectionPool('test_fake_breaker', driver=backend, breaker_backoff=10)
+    backend.down = True
+    kill_connections(pool)
+
+    for _ in range(10):
+        try:
+            with pool.connection():
+                pass
+        except CircuitBreakerOpenError:
+            pass
+        else:
+            assert False
+    assert backend.attempts == 1
+    assert pool.stats['breaker']['state'] == CircuitBreaker.OPEN
+
+
+def test_pool_skip_dead_connection():
+    backend = FlakyBackend()
+    pool = MySQLConnectionPool('test_fake_breaker_dead', driver=backend, breaker_backoff=10)
+    first, second = pool.borrow_connection(), pool.borrow_connection()
+    pool.return_connection(first)
+    pool.return_connection(second)
+
+    backend.down = True
+    pool._breaker.record_failure()
+    first.close()
+    first.ping = lambda reconnect=False: (_ for _ in ()).throw(ConnectionError('Connection is lost'))
+
+    # The live free connection is used while the circuit breaker is open
+    with pool.connection() as conn:
+        assert conn is second
+    assert backend.attempts == 0
+    assert pool.pool_size == 1 and pool.free_size == 1
+
+
+def test_pool_no_reconnect_storm():
+    backend = FlakyBackend()
+    pool = MySQLConnectionPool('test_fake_breaker', driver=backend, breaker_backoff=0.2)
+    backend.down = True
+    kill_connections(pool)
+    results = []
+
+    def task():
+        try:
+            with pool.connection():
+                results.append(True)
+        except CircuitBreakerOpenError:
+            results.append(False)
+
+    threads = [threading.Thread(target=task) for _ in range(100)]
+    [t.start() for t in threads]
+    time.sleep(0.1)
+    backend.down = False
+    [t.join() for t in threads]
+
+    assert backend.attempts == 1
+    assert len(results) == 100
+    with pool.connection():
+        pass
+    assert pool.stats['breaker']['state'] == CircuitBreaker.CLOSED
+
+
+if __name__ == '__main__':
+    test_breaker_states()
+    test_pool_fail_fast()
+    test_pool_skip_dead_connection()
+    test_pool_no_reconnect_storm()
@@ -11,6 +11,7 @@ import datetime
 import logging
 import string
 import threading
+import time
 import pandas as pd
 import random
 
@@ -121,6 +122,25 @@ def test_single_thread_insert():
     test_query()
 
 
+def test_query_deadline():
+    from pymysqlpool.connection import QueryTimeoutError
+
+    start = time.perf_counter()
+    try:
+        with conn_pool().cursor(timeout=1) as cursor:
+            cursor.execute('SELECT SLEEP(10)')
+            cursor.fetchall()
+    except QueryTimeoutError as err:
+        print('Query killed: {}'.format(err))
+    else:
+        assert False
+    assert time.perf_counter() - start < 5
+
+    # The connection is recovered and still usable
+    print(conn_pool().size)
+    test_query()
+
+
 def test_query_with_pandas():
     import pandas as pd
 
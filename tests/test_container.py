@@ -57,6 +57,49 @@ def test_with_multi_threads():
         t.join()
 
 
+def test_striped_get_return():
+    striped = StripedPoolContainer(10, stripes=4)
+    for i in range(100):
+        try:
+            striped.add(i)
+        except PoolIsFullException:
+            pass
+    assert striped.pool_size == 10 and striped.free_size == 10
+
+    # Items are stolen from the other stripes once the own stripe is empty
+    items = [striped.get(block=False) for _ in range(10)]
+    assert sorted(items) == list(range(10))
+    try:
+        striped.get(wait_timeout=0.1)
+    except PoolIsEmptyException:
+        pass
+    else:
+        assert False
+
+    for item in items:
+        striped.return_(item)
+    assert striped.free_size == 10
+
+
+def test_striped_with_multi_threads():
+    striped = StripedPoolContainer(10, stripes=4)
+    for i in range(10):
+        striped.add(i)
+
+    def striped_worker():
+        for _ in range(100):
+            item = striped.get(wait_timeout=10)
+            striped.return_(item)
+
+    threads = [threading.Thread(target=striped_worker) for _ in range(50)]
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+    assert striped.free_size == 10
+
+
 if __name__ == '__main__':
     test_add_new_items()
     # test_get_return()
@@ -0,0 +1,95 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_hedge.py
+# Date   : 2026-10-18 17-10
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+import time
+
+from pymysqlpool.backend import FakeBackend
+from pymysqlpool.connection import MySQLConnectionPool
+from pymysqlpool.hedge import *
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.ERROR)
+
+
+def replica(pool_name, delay):
+    def query_handler(connection, sql, args):
+        if sql.startswith('SELECT'):
+            time.sleep(delay)
+            return [{'replica': pool_name}]
+        return []
+
+    return MySQLConnectionPool(pool_name, driver=FakeBackend(query_handler))
+
+
+def test_fingerprint():
+    assert fingerprint('SELECT * FROM user WHERE id = 1') == fingerprint('select *  from user where id = 20')
+    assert fingerprint("SELECT * FROM user WHERE name = 'Jerry'") == 'select * from user where name = ?'
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker(window=100)
+    for i in range(100):
+        tracker.record('q', i)
+    assert tracker.percentile('q', 95) == 94
+    assert tracker.percentile('q', 95, min_samples=200) is None
+
+
+def test_hedge_slow_replica():
+    reader = HedgedReader([replica('test_slow', 1), replica('test_fast', 0)], hedge_delay=0.05)
+    start = time.perf_counter()
+    rows = reader.query('SELECT * FROM user')
+    assert time.perf_counter() - start < 0.5
+    assert rows == [{'replica': 'test_fast'}]
+    assert reader.stats['hedge_wins'] == 1
+    # The slow primary is recorded rather than the fast hedge
+    assert reader._latencies.percentile(fingerprint('SELECT * FROM user'), 50) >= 0.05
+    reader.close()
+
+
+def test_hedge_busy_workers():
+    reader = HedgedReader([replica('test_slow', 1), replica('test_fast_0', 0), replica('test_fast_1', 0)],
+                          hedge_delay=0.05, max_hedge_ratio=1, max_workers=1)
+    reader.query('SELECT * FROM user')
+
+    # The only worker is still stuck on the slow replica, the query is hedged anyway
+    start = time.perf_counter()
+    rows = reader.query('SELECT * FROM user')
+    assert time.perf_counter() - start < 0.5
+    assert rows == [{'replica': 'test_fast_1'}]
+    reader.close()
+
+
+def test_hedge_rate_capped():
+    reader = HedgedReader([replica('test_slow_0', 0.02), replica('test_slow_1', 0.02)],
+                          hedge_delay=0.001, max_hedge_ratio=0.1, hedge_burst=1)
+    for _ in range(50):
+        reader.query('SELECT * FROM user')
+    assert reader.stats['hedged'] <= 1 + 50 * 0.1
+    reader.close()
+
+
+def test_hedge_write_rejected():
+    reader = HedgedReader([replica('test_fast', 0)])
+    for sql in ('UPDATE user SET age = 1', 'SELECT * FROM user FOR UPDATE'):
+        try:
+            reader.query(sql)
+        except ValueError:
+            pass
+        else:
+            assert False
+    reader.close()
+
+
+if __name__ == '__main__':
+    test_fingerprint()
+    test_latency_percentile()
+    test_hedge_slow_replica()
+    test_hedge_busy_workers()
+    test_hedge_rate_capped()
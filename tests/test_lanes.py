@@ -0,0 +1,122 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_lanes.py
+# Date   : 2026-10-18 23-40
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+import threading
+import time
+
+from pymysqlpool.backend import FakeBackend
+from pymysqlpool.lanes import *
+from pymysqlpool.connection import MySQLConnectionPool
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.CRITICAL)
+
+
+def test_reserved_capacity():
+    pool = MySQLConnectionPool('test_fake_lanes', driver=FakeBackend(), max_pool_size=4,
+                               enable_auto_resize=False, reserved_connections=1)
+    low = [pool.borrow_connection(PRIORITY_LOW) for _ in range(3)]
+
+    try:
+        pool._lanes.acquire(PRIORITY_LOW, timeout=0.05)
+    except LaneWaitTimeoutError:
+        pass
+    else:
+        assert False
+
+    # The reserved connection is still available to the high priority lane
+    with pool.cursor(priority=PRIORITY_HIGH) as cursor:
+        cursor.execute('SELECT 1')
+
+    [pool.return_connection(conn) for conn in low]
+    stats = pool.stats['lanes']
+    assert stats[PRIORITY_LOW]['admitted'] == 3 and stats[PRIORITY_LOW]['timeouts'] == 1
+    assert stats[PRIORITY_HIGH]['admitted'] == 1
+    assert all(lane['in_use'] == 0 for lane in stats.values())
+
+
+def test_weighted_order():
+    lanes = PriorityLanes(lambda: 1, starvation_timeout=10)
+    lanes.acquire(PRIORITY_HIGH)
+    order = []
+
+    def task(priority):
+        lanes.acquire(priority)
+        order.append(priority)
+        lanes.release(priority)
+
+    threads = []
+    for priority in [PRIORITY_LOW] * 7 + [PRIORITY_NORMAL] * 14 + [PRIORITY_HIGH] * 28:
+        threads.append(threading.Thread(target=task, args=(priority,)))
+        threads[-1].start()
+    while lanes.stats[PRIORITY_HIGH]['waiting'] < 28:
+        time.sleep(0.01)
+
+    lanes.release(PRIORITY_HIGH)
+    [t.join() for t in threads]
+
+    # The first 7 admissions follow the weights 4:2:1
+    first = order[:7]
+    assert first.count(PRIORITY_HIGH) == 4
+    assert first.count(PRIORITY_NORMAL) == 2
+    assert first.count(PRIORITY_LOW) == 1
+
+
+def test_starvation():
+    lanes = PriorityLanes(lambda: 1, weights={PRIORITY_HIGH: 100, PRIORITY_LOW: 1}, starvation_timeout=0.1,
+                          default_priority=PRIORITY_LOW)
+    lanes.acquire(PRIORITY_HIGH)
+    order = []
+
+    def task(priority):
+        lanes.acquire(priority)
+        order.append(priority)
+        time.sleep(0.02)
+        lanes.release(priority)
+
+    low = threading.Thread(target=task, args=(PRIORITY_LOW,))
+    low.start()
+    time.sleep(0.15)
+    threads = [threading.Thread(target=task, args=(PRIORITY_HIGH,)) for _ in range(5)]
+    [t.start() for t in threads]
+    time.sleep(0.05)
+
+    lanes.release(PRIORITY_HIGH)
+    low.join()
+    [t.join() for t in threads]
+    # The low priority borrower has waited longer than the starvation timeout
+    assert order[0] == PRIORITY_LOW
+    assert lanes.stats[PRIORITY_LOW]['max_wait'] >= 0.15
+
+
+def test_custom_lanes_default_priority():
+    weights = {'interactive': 3, 'batch': 1}
+    try:
+        MySQLConnectionPool('test_fake_lanes_custom', driver=FakeBackend(), lane_weights=weights)
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    pool = MySQLConnectionPool('test_fake_lanes_custom', driver=FakeBackend(), lane_weights=weights,
+                               default_priority='batch')
+    with pool.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    with pool.cursor(priority='interactive') as cursor:
+        cursor.execute('SELECT 1')
+    assert pool.stats['lanes']['batch']['admitted'] == 1
+    assert pool.stats['lanes']['interactive']['admitted'] == 1
+
+
+if __name__ == '__main__':
+    test_reserved_capacity()
+    test_weighted_order()
+    test_starvation()
+    test_custom_lanes_default_priority()
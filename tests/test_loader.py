@@ -0,0 +1,108 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_loader.py
+# Date   : 2026-10-18 19-05
+# Version: 0.1
+# Description: description of this file.
+
+import datetime
+import logging
+
+from pymysqlpool.backend import FakeBackend
+from pymysqlpool.connection import MySQLConnectionPool
+from pymysqlpool.loader import *
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.ERROR)
+
+config = {
+    'pool_name': 'test',
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'root',
+    'password': 'chris',
+    'database': 'test',
+}
+
+
+def fake_pool():
+    backend = FakeBackend()
+    return MySQLConnectionPool('test_fake_loader', driver=backend), backend
+
+
+def test_serialize_escape():
+    rows = [(1, 'Jerry\tTom', None, True), (2, 'a\\b\nc', b'\x00', datetime.date(2017, 6, 15))]
+    data = b''.join(serialize_rows(rows))
+    assert data == b'1\tJerry\\tTom\t\\N\t1\n2\ta\\\\b\\nc\t\\0\t2017-06-15\n'
+
+
+def test_serialize_timedelta():
+    rows = [(datetime.timedelta(seconds=1.5),), (datetime.timedelta(seconds=-0.5),),
+            (datetime.timedelta(days=-1, hours=2, minutes=3),), (datetime.timedelta(days=2),)]
+    data = b''.join(serialize_rows(rows))
+    assert data == b'00:00:01.500000\n-00:00:00.500000\n-21:57:00\n48:00:00\n'
+
+
+def test_serialize_chunks():
+    chunks = list(serialize_rows(((i, 'user_{}'.format(i)) for i in range(1000)), chunk_size=100))
+    assert len(chunks) > 10
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    assert sum(chunk.count(b'\n') for chunk in chunks) == 1000
+
+
+def test_load_rows_fake():
+    pool, backend = fake_pool()
+    result = pool.load_rows('user', ['name', 'age'], (('user_{}'.format(i), i) for i in range(1000)))
+    assert result.rows == 1000
+    assert result.warnings == []
+
+    loaded = [conn for conn in backend.connections if conn.loaded]
+    assert len(loaded) == 1 and loaded[0].local_infile
+    assert loaded[0].queries[-1] == ('COMMIT', None)
+    # A dedicated connection is used and closed, the pool connections are left alone
+    assert not loaded[0].open and loaded[0] not in list(pool)
+    assert pool.pool_size == 1 and pool.free_size == 1
+    assert not any(conn.local_infile for conn in pool)
+
+
+def test_load_rows_parallel_fake():
+    pool, backend = fake_pool()
+    result = pool.load_rows('user', ['name', 'age'], (('user_{}'.format(i), i) for i in range(10000)),
+                            parallel=4, chunk_size=1024)
+    assert result.rows == 10000
+    assert sum(len(conn.loaded) for conn in backend.connections) == 4
+    assert pool.pool_size == pool.free_size == 1
+
+
+def test_load_rows_error_rollback():
+    pool, backend = fake_pool()
+
+    def rows():
+        yield 'Jerry', 20
+        raise ValueError('Broken row')
+
+    try:
+        pool.load_rows('user', ['name', 'age'], rows())
+    except ValueError:
+        pass
+    else:
+        assert False
+    assert any(conn.queries and conn.queries[-1] == ('ROLLBACK', None) for conn in backend.connections)
+
+
+def test_load_rows():
+    pool = MySQLConnectionPool(**config)
+    with pool.cursor() as cursor:
+        cursor.execute('TRUNCATE user')
+    result = pool.load_rows('user', ['name', 'age'], (('user_{}'.format(i), i % 100) for i in range(100000)),
+                            parallel=2)
+    print(result.rows, '{:.0f} rows/s'.format(result.rows_per_second), result.warnings)
+
+
+if __name__ == '__main__':
+    test_serialize_escape()
+    test_serialize_timedelta()
+    test_load_rows_fake()
+    test_load_rows()
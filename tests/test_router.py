@@ -0,0 +1,119 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_router.py
+# Date   : 2026-10-18 11-02
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+import threading
+import time
+from collections import Counter
+
+from pymysqlpool.backend import FakeBackend
+from pymysqlpool.router import *
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.ERROR)
+
+config = {
+    'host': 'localhost',
+    'port': 3306,
+    'user': 'root',
+    'password': 'chris',
+    'pool_resize_boundary': 8,
+    'enable_auto_resize': True,
+}
+
+shards = {'shard_{:02d}'.format(i): {'database': 'test'} for i in range(4)}
+
+
+def test_hash_ring_distribution():
+    ring = ConsistentHashRing(shards)
+    counter = Counter(ring.get_shard(key) for key in range(10000))
+    print(counter)
+    assert set(counter) == set(shards)
+    assert min(counter.values()) > 1000
+
+
+def test_hash_ring_remove_shard():
+    ring = ConsistentHashRing(shards)
+    before = {key: ring.get_shard(key) for key in range(1000)}
+    ring.remove_shard('shard_00')
+    after = {key: ring.get_shard(key) for key in range(1000)}
+
+    for key, shard in before.items():
+        if shard != 'shard_00':
+            assert after[key] == shard
+        else:
+            assert after[key] != 'shard_00'
+
+
+def test_range_shard_map():
+    shard_map = RangeShardMap([(100, 'shard_00'), (200, 'shard_01'), (None, 'shard_02')])
+    assert shard_map.get_shard(0) == 'shard_00'
+    assert shard_map.get_shard(100) == 'shard_01'
+    assert shard_map.get_shard(10000) == 'shard_02'
+
+    try:
+        RangeShardMap([(100, 'shard_00')]).get_shard(100)
+    except UnknownShardError:
+        pass
+    else:
+        assert False
+
+    try:
+        RangeShardMap([(None, 'shard_00'), (100, 'shard_01')])
+    except ValueError:
+        pass
+    else:
+        assert False
+
+
+def test_router_cursor():
+    router = ShardRouter('test_router', shards, **config)
+    for user_id in range(10):
+        with router.cursor(user_id) as cursor:
+            cursor.execute('SELECT %s AS user_id', (user_id,))
+            print(router.shard_for(user_id), cursor.fetchone())
+    print(router)
+
+
+def test_scatter_gather():
+    router = ShardRouter('test_router', shards, **config)
+    result = router.scatter_gather('SELECT DATABASE() AS db')
+    print(result)
+    assert set(result) == set(shards)
+
+
+class SlowShardBackend(FakeBackend):
+    """A fake backend whose shard `slow` takes a while to connect"""
+
+    def connect(self, host, *args, **kwargs):
+        if host == 'slow':
+            time.sleep(0.5)
+        return super(SlowShardBackend, self).connect(host, *args, **kwargs)
+
+
+def test_slow_shard_not_blocking():
+    router = ShardRouter('test_router_slow', {'slow': {'host': 'slow'}, 'fast': {'host': 'fast'}},
+                         driver=SlowShardBackend())
+    threading.Thread(target=router.pool, args=('slow',)).start()
+    time.sleep(0.05)
+
+    start = time.perf_counter()
+    router.pool('fast')
+    assert time.perf_counter() - start < 0.3
+    assert router.scatter_gather('SELECT 1', shards=[]) == {}
+    router.close()
+
+
+if __name__ == '__main__':
+    test_hash_ring_distribution()
+    test_hash_ring_remove_shard()
+    test_range_shard_map()
+    test_slow_shard_not_blocking()
+    # test_router_cursor()
+    # test_scatter_gather()
@@ -0,0 +1,126 @@
+# -*-coding: utf-8-*-
+# Author : Christopher Lee
+# License: MIT License
+# File   : test_session.py
+# Date   : 2026-10-18 21-40
+# Version: 0.1
+# Description: description of this file.
+
+import logging
+
+from pymysqlpool.backend import FakeBackend, PyMySQLBackend
+from pymysqlpool.connection import MySQLConnectionPool
+from pymysqlpool.session import *
+
+logging.basicConfig(format='[%(asctime)s][%(name)s][%(module)s.%(lineno)d][%(levelname)s] %(message)s',
+                    datefmt='%Y-%m-%d %H:%M:%S',
+                    level=logging.ERROR)
+
+
+def fake_pool():
+    backend = FakeBackend()
+    pool = MySQLConnectionPool('test_fake_session', driver=backend, database='test', max_pool_size=1)
+    return pool, backend
+
+
+def statements_after(conn, sql):
+    queries = [q for q, _ in conn.queries]
+    return queries[queries.index(sql) + 1:]
+
+
+def test_observe_statements():
+    state = SessionState()
+    state.observe('SELECT * FROM user', autocommit=True)
+    assert not state.dirty
+
+    state.observe('  /* comment */ BEGIN', autocommit=True)
+    assert state.in_transaction and not state.session_changed
+    state.observe('ROLLBACK TO SAVEPOINT a', autocommit=True)
+    assert state.in_transaction
+    state.observe(b'COMMIT', autocommit=True)
+    assert not state.dirty
+
+    for sql in ('SET @a = 1', 'use test', 'CREATE TEMPORARY TABLE t (id INT)', "SELECT GET_LOCK('a', 10)",
+                'SELECT 1 INTO @a', 'SELECT @a := 1', 'CALL p()', "(SELECT GET_LOCK('a', 1))"):
+        state.clear()
+        state.observe(sql, autocommit=True)
+        assert state.session_changed, sql
+
+    state.clear()
+    state.observe('INSERT INTO user (name) VALUES ("Jerry")', autocommit=False)
+    assert state.in_transaction and not state.session_changed
+
+
+def test_clean_connection_no_round_trip():
+    pool, backend = fake_pool()
+    with pool.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    with pool.connection() as conn:
+        conn.cursor().execute('INSERT INTO user (name) VALUES ("Jerry")')
+        conn.commit()
+    assert statements_after(conn, 'COMMIT') == []
+
+
+def test_open_transaction_rolled_back():
+    pool, backend = fake_pool()
+    with pool.connection() as conn:
+        conn.cursor().execute('UPDATE user SET age = 1')
+    assert statements_after(conn, 'UPDATE user SET age = 1') == ['ROLLBACK']
+    assert not conn.session_state.dirty
+
+
+def test_changed_session_reset():
+    pool, backend = fake_pool()
+    with pool.cursor() as cursor:
+        cursor.execute('SET @a = 1')
+        conn = cursor.connection
+    assert statements_after(conn, 'SET @a = 1') == ['COM_RESET_CONNECTION']
+
+    with pool.connection() as conn:
+        conn.select_db('other')
+    assert statements_after(conn, 'USE `other`') == ['COM_RESET_CONNECTION', 'USE `test`']
+
+
+def test_begin_out_of_query_rolled_back():
+    pool, backend = fake_pool()
+    with pool.cursor() as cursor:
+        cursor.connection.begin()
+        cursor.execute('UPDATE user SET age = 1')
+        conn = cursor.connection
+    assert statements_after(conn, 'UPDATE user SET age = 1') == ['ROLLBACK']
+
+
+def test_server_status_in_transaction():
+    from pymysql.constants import SERVER_STATUS
+
+    class Connection(object):
+        server_status = SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT
+
+    conn = Connection()
+    backend = PyMySQLBackend()
+    assert not backend.in_transaction(conn)
+    conn.server_status |= SERVER_STATUS.SERVER_STATUS_IN_TRANS
+    assert backend.in_transaction(conn)
+
+
+def test_changed_session_dropped_without_reset():
+    backend = FakeBackend()
+    backend.supports_reset_connection = False
+    pool = MySQLConnectionPool('test_fake_session_no_reset', driver=backend, database='test', max_pool_size=1)
+    with pool.cursor() as cursor:
+        cursor.execute('SET @a = 1')
+        conn = cursor.connection
+    assert not conn.open and conn not in list(pool)
+
+    with pool.cursor() as cursor:
+        assert cursor.connection is not conn
+
+
+if __name__ == '__main__':
+    test_observe_statements()
+    test_clean_connection_no_round_trip()
+    test_open_transaction_rolled_back()
+    test_changed_session_reset()
+    test_begin_out_of_query_rolled_back()
+    test_server_status_in_transaction()
+    test_changed_session_dropped_without_reset()